@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+#
+# Compares the adjective lemmatization with the reversed suffix trie (GermaLemma._adj_lemma) to the former scan over
+# all entries of ADJ_SUFFIXES_DICT on the adjectives of the TIGER corpus.
+# Run evaluate_germalemma.py afterwards to compare the overall success rate.
+#
+# Usage: python benchmarks/bench_adj_lemma.py tiger_release_aug07.corrected.16012013.conll09
+
+import codecs
+import sys
+import time
+
+from slughorn.processor.external_libraries.germalemma.germalemma import GermaLemma, ADJ_SUFFIXES_DICT
+
+
+def adj_lemma_scan(w):
+    # former implementation of GermaLemma._adj_lemma
+    for full, reduced in ADJ_SUFFIXES_DICT.items():
+        if w.endswith(full):
+            return w[:-len(full)] + reduced
+    return w
+
+
+def load_adjectives(corpus_file):
+    adjectives = []
+    with codecs.open(corpus_file, encoding='utf8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 15 and parts[4].startswith('ADJ'):
+                adjectives.append((parts[1], parts[2]))
+    return adjectives
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('run as: %s <path to TIGER corpus conll09 file>' % sys.argv[0])
+        exit(1)
+
+    adjectives = load_adjectives(sys.argv[1])
+    tokens = [token for token, lemma in adjectives]
+    lemmatizer = GermaLemma(lemmata={'N': {}, 'V': {}, 'ADJ': {}, 'ADV': {}}, use_pattern_module=False)
+    print("%d adjectives" % len(tokens))
+
+    start = time.perf_counter()
+    scan_results = [adj_lemma_scan(token) for token in tokens]
+    scan_time = time.perf_counter() - start
+    print("suffix scan: %.3fs (%.0f adjectives/s)" % (scan_time, len(tokens) / scan_time))
+
+    start = time.perf_counter()
+    trie_results = [lemmatizer._adj_lemma(token) for token in tokens]
+    trie_time = time.perf_counter() - start
+    print("suffix trie: %.3fs (%.0f adjectives/s)" % (trie_time, len(tokens) / trie_time))
+    print("speedup: %.1fx" % (scan_time / trie_time))
+
+    differences = sum(scan != trie for scan, trie in zip(scan_results, trie_results))
+    print("different results (longest match instead of first match): %d" % differences)
+    for name, results in (('suffix scan', scan_results), ('suffix trie', trie_results)):
+        correct = sum(result.lower() == lemma.lower() for result, (token, lemma) in zip(results, adjectives))
+        print("correct lemmata with %s: %.2f%%" % (name, correct / len(adjectives) * 100))
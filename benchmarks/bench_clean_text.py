@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+#
+# Compares the former clean_text (URL regex, str.replace passes and a character filter over a list of valid unicodes)
+# with the single pass str.translate cleaner
+#
+# Usage: python benchmarks/bench_clean_text.py [amount of posts]
+# By default a synthetic corpus of 1M posts is used.
+
+import random
+import sys
+import time
+
+from slughorn.processor.ExpressionExtractor import clean_text
+from slughorn.processor.util import URL_REGEX, VALID_UNICODES
+
+VALID_UNICODES_LIST = sorted(VALID_UNICODES)
+
+WORDS = ["Heute", "war", "ein", "wunderschöner", "Tag", "am", "See", "danke", "an", "alle", "Marathon", "4:12:33",
+         "#running", "@freund", "Qué", "bonito", "¡vuelvo", "pronto!", "l'été", "„super“", "grüße", "2018", "E-Mail",
+         "<3", "*lol*", "a/b", "😂", "🎉🎉", "…", "ハロー", "x_X", "+49", "www.example.fr/blog",
+         "https://tickets.example.com/konzert?id=42", "z.B.", "3.5"]
+
+
+def old_clean_text(text):
+    cleaned_text = URL_REGEX.sub('', text)
+    for character in ['-', '_', '+', '>', '<', '*', '/', ]:
+        cleaned_text = cleaned_text.replace(character, ' ')
+    return "".join(i for i in cleaned_text if ord(i) in VALID_UNICODES_LIST)
+
+
+if __name__ == '__main__':
+    amount_posts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(0)
+    posts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 25))) for _ in range(amount_posts)]
+    print("Cleaning {} posts".format(len(posts)))
+
+    start = time.perf_counter()
+    old = [old_clean_text(post) for post in posts]
+    old_time = time.perf_counter() - start
+    print("old clean_text: {:.2f}s ({:.0f} posts/s)".format(old_time, len(posts) / old_time))
+
+    start = time.perf_counter()
+    new = [clean_text(post) for post in posts]
+    new_time = time.perf_counter() - start
+    print("clean_text:     {:.2f}s ({:.0f} posts/s)".format(new_time, len(posts) / new_time))
+
+    print("speedup: {:.1f}x".format(old_time / new_time))
+    print("identical results: {}".format(old == new))
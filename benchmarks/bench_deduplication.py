@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#
+# Compares the exact and the Bloom filter deduplication of password candidates across list sizes: throughput, memory
+# footprint, duplicate rate and the new candidates the Bloom filter dropped (false positives)
+#
+# Usage: python benchmarks/bench_deduplication.py [list sizes ...] [--false_positive_rate 0.001]
+# The candidates are synthetic strings drawn with replacement, about half of them are duplicates.
+
+import random
+import sys
+import time
+
+from slughorn.processor.CandidateFilter import Deduplicator
+
+
+def synthetic_candidates(amount, seed=0):
+    rng = random.Random(seed)
+    distinct = int(amount * 0.7)
+    for _ in range(amount):
+        yield 'kandidat{}'.format(rng.randrange(distinct))
+
+
+def run(mode, amount, false_positive_rate):
+    deduplicator = Deduplicator(mode, capacity=amount, false_positive_rate=false_positive_rate)
+    start = time.perf_counter()
+    kept = sum(1 for _ in deduplicator.deduplicate(synthetic_candidates(amount)))
+    elapsed = time.perf_counter() - start
+    return deduplicator, kept, elapsed
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    false_positive_rate = 0.001
+    if '--false_positive_rate' in args:
+        index = args.index('--false_positive_rate')
+        false_positive_rate = float(args[index + 1])
+        del args[index:index + 2]
+    sizes = [int(arg) for arg in args] or [100000, 1000000, 5000000]
+
+    # generating the candidates takes part of the time, it is the same for both modes
+    print("{:>10} {:>6} {:>10} {:>10} {:>10} {:>12}".format('candidates', 'mode', 'cand./s', 'MB', 'dup. rate',
+                                                          'false pos.'))
+    for amount in sizes:
+        exact, exact_kept, exact_time = run('exact', amount, false_positive_rate)
+        bloom, bloom_kept, bloom_time = run('bloom', amount, false_positive_rate)
+        for mode, deduplicator, elapsed in (('exact', exact, exact_time), ('bloom', bloom, bloom_time)):
+            false_positives = deduplicator.amount_duplicates - exact.amount_duplicates
+            print("{:>10} {:>6} {:>10.0f} {:>10.1f} {:>10.2%} {:>12}".format(
+                amount, mode, amount / elapsed, deduplicator.filter.memory_size() / 1e6,
+                deduplicator.duplicate_rate(), false_positives))
+        print("{:>10} {:>6} observed false positive rate {:.6f} (expected at most {})".format(
+            '', 'bloom', (exact_kept - bloom_kept) / exact_kept, false_positive_rate))
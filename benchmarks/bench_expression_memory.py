@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# Compares the memory and pickle size of a list of Word objects with a __dict__ (the former representation), a list of
+# slotted Word objects and a WordTable
+#
+# Usage: python benchmarks/bench_expression_memory.py [amount of words]
+
+import pickle
+import random
+import sys
+import tracemalloc
+
+from slughorn.processor.ExpressionObjects import Word, WordTable
+
+
+class DictWord:
+
+    def __init__(self, term, occurrences=0, frequency=0.0, exceptionalism=0, language=None, score=0):
+        self.term = term
+        self.occurrences = occurrences
+        self.frequency = frequency
+        self.exceptionalism = exceptionalism
+        self.language = language
+        self.score = score
+
+
+def measure(create):
+    tracemalloc.start()
+    result = create()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+if __name__ == '__main__':
+    amount_words = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rng = random.Random(0)
+    # the terms exist anyway (e.g. in the word counters), only the representation of the expressions is measured
+    terms = ['word{}'.format(i) for i in range(amount_words)]
+    rows = [(term, rng.randint(1, 1000), rng.random(), rng.random(), rng.choice(['de', 'en']), rng.random())
+            for term in terms]
+
+    dict_words, dict_size = measure(lambda: [DictWord(*row) for row in rows])
+    slotted_words, slotted_size = measure(lambda: [Word(*row) for row in rows])
+    table, table_size = measure(lambda: WordTable.from_expressions(slotted_words))
+
+    print("{} words".format(amount_words))
+    print("representation      memory (MB)  pickle (MB)")
+    for name, expressions, size in (("Word with __dict__", dict_words, dict_size),
+                                    ("slotted Word", slotted_words, slotted_size),
+                                    ("WordTable", table, table_size)):
+        pickled = pickle.dumps(expressions, protocol=pickle.HIGHEST_PROTOCOL)
+        print("{:18s}  {:11.1f}  {:11.1f}".format(name, size / 1e6, len(pickled) / 1e6))
+
+    print("identical reprs: {}".format([repr(word) for word in slotted_words] == [repr(word) for word in table]))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#
+# Compares the per-post language detection (detect_language) with the batched detection (detect_languages)
+#
+# Usage: python benchmarks/bench_language_detection.py [twitter_*.pkl | facebook_*.pkl ...]
+# Without arguments a synthetic corpus of 200k posts is used.
+
+import itertools
+import random
+import sys
+import time
+
+from slughorn.processor.ExpressionExtractor import detect_language, detect_languages, LANGUAGE_DETECTION_CHUNK_SIZE
+from slughorn.processor.util import chunks
+from slughorn.scraper.util import load_posts
+
+SAMPLE_POSTS = [
+    "Heute war ein wunderschöner Tag am See, danke an alle die dabei waren!",
+    "Just finished my first marathon in 4:12:33 - never again... until next year #running",
+    "Qué bonito es Madrid en primavera, ¡vuelvo pronto!",
+    "Bonjour à tous, le nouveau blog est en ligne: www.example.fr/blog",
+    "ハロー、元気ですか",
+    "Wer kommt morgen mit zum Konzert? Karten gibt es noch unter https://tickets.example.com",
+]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        posts = list(itertools.chain.from_iterable(load_posts(file) for file in sys.argv[1:]))
+    else:
+        posts = [random.choice(SAMPLE_POSTS) for _ in range(200000)]
+    print("Detecting languages of {} posts".format(len(posts)))
+
+    start = time.perf_counter()
+    single = [detect_language(post, 'de') for post in posts]
+    single_time = time.perf_counter() - start
+    print("per post: {:.2f}s ({:.0f} posts/s)".format(single_time, len(posts) / single_time))
+
+    start = time.perf_counter()
+    batched = []
+    for chunk in chunks(posts, LANGUAGE_DETECTION_CHUNK_SIZE):
+        batched.extend(detect_languages(chunk, 'de'))
+    batched_time = time.perf_counter() - start
+    print("batched:  {:.2f}s ({:.0f} posts/s)".format(batched_time, len(posts) / batched_time))
+
+    print("speedup: {:.1f}x".format(single_time / batched_time))
+    print("identical results: {}".format(single == batched))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#
+# Runs the extraction with a lemma cache file of a previous case, first in the main process and then with a pool of
+# worker processes, and checks that the lemmata of the file are kept and the lemmata found by the workers are added.
+#
+# Usage: python benchmarks/bench_lemma_cache.py [twitter_*.pkl | facebook_*.pkl ...] [--workers 4]
+
+import itertools
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+from slughorn.processor.ExpressionExtractor import ExpressionExtractor, lemmatizer
+from slughorn.scraper.util import load_posts
+
+SAMPLE_POSTS = [
+    "Die Hunde gingen gestern mit den Kindern in den schönen Wald.",
+    "Wir haben die neuen Häuser am Hafen besichtigt und waren begeistert.",
+    "Heute spielen die Katzen wieder im Garten unserer Nachbarn.",
+    "Mein Lieblingsverein hat am Samstag endlich wieder gewonnen!",
+]
+
+# lemmata of a previous case, which have to survive every extraction
+PREVIOUS_LEMMATA = [(('Schiffe', 'NN'), 'Schiff'), (('segelten', 'VVFIN'), 'segeln'), (('blauen', 'ADJA'), 'blau')]
+
+
+def load_cache(file):
+    with open(file, 'rb') as f:
+        return dict(pickle.load(f))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = 4
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    if args:
+        posts = list(itertools.chain.from_iterable(load_posts(file) for file in args))
+    else:
+        posts = [random.choice(SAMPLE_POSTS) for _ in range(50000)]
+    print("Extracting {} posts".format(len(posts)))
+
+    directory = tempfile.mkdtemp()
+    for run_workers in (1, workers):
+        cache_file = os.path.join(directory, 'lemma_cache_{}.pkl'.format(run_workers))
+        with open(cache_file, 'wb') as f:
+            pickle.dump(PREVIOUS_LEMMATA, f)
+        # start every run with an empty cache like a new call of slughorn, the workers inherit it
+        lemmatizer.lemmata.clear()
+
+        start = time.perf_counter()
+        ExpressionExtractor(posts, 'bench', 'de').extract_words_and_numbers(0.5, run_workers,
+                                                                           lemma_cache_file=cache_file)
+        elapsed = time.perf_counter() - start
+
+        cache = load_cache(cache_file)
+        kept = all(cache.get(key) == lemma for key, lemma in PREVIOUS_LEMMATA)
+        print("{} worker(s): {:.2f}s, {} cached lemmata, lemmata of the previous case kept: {}".format(
+            run_workers, elapsed, len(cache), kept))
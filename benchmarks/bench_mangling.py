@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+#
+# Measures how many password candidates per minute the mangling WordListGenerator streams into /dev/null and checks
+# that they are emitted in the order of their priority
+#
+# Usage: python benchmarks/bench_mangling.py [amount of candidates] [amount of words] [amount of numbers]
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+from slughorn.processor.ExpressionObjects import Number, Word
+from slughorn.processor.WordListGenerator import WordListGenerator, combine
+
+
+def synthetic_expressions(amount_words, amount_numbers):
+    rng = random.Random(0)
+    words = [Word('wort{}'.format(i), score=rng.random()) for i in range(amount_words)]
+    words.sort(key=lambda word: word.score, reverse=True)
+    numbers = [Number(str(rng.randint(0, 9999)), rng.randint(1, 100)) for _ in range(amount_numbers)]
+    return {'words': words, 'numbers': numbers}
+
+
+def check_order():
+    rng = random.Random(1)
+    left = sorted(((rng.random(), i) for i in range(200)), reverse=True)
+    right = sorted(((rng.random(), i) for i in range(50)), reverse=True)
+    combined = list(combine(left, right, lambda a, b: (a, b)))
+    priorities = [priority for priority, _ in combined]
+    return len(combined) == len(left) * len(right) and priorities == sorted(priorities, reverse=True)
+
+
+if __name__ == '__main__':
+    amount_candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    amount_words = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    amount_numbers = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    print("combinations in priority order: {}".format(check_order()))
+
+    generator = WordListGenerator(synthetic_expressions(amount_words, amount_numbers), 'benchmark', mangle=True)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as f:
+        amount = generator.write_to_stream(f, limit=amount_candidates)
+    elapsed = time.perf_counter() - start
+    print("{} candidates from {} words and {} numbers in {:.2f}s".format(amount, amount_words, amount_numbers, elapsed))
+    print("{:.1f} million candidates per minute".format(amount / elapsed * 60 / 1e6))
+
+    # tracemalloc slows down the generation, so the memory is measured in a second run
+    tracemalloc.start()
+    with open(os.devnull, 'w') as f:
+        generator.write_to_stream(f, limit=amount_candidates)
+    print("peak memory: {:.1f} MB".format(tracemalloc.get_traced_memory()[1] / 1e6))
+    tracemalloc.stop()
+    print("first candidates: {}".format(list(islice(generator.generate_candidates(), 10))))
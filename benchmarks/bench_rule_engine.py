@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+#
+# Measures the yield of a generated rule set (BEST64 plus the rules of random numbers) on synthetic words with the
+# RuleEngine and prints the throughput in rule applications per second. It checks beforehand that a leading 'l' is
+# only pruned as a no-op for the plain (lower case) words, not for the mangled candidates.
+#
+# Usage: python benchmarks/bench_rule_engine.py [amount of rules] [amount of words] [workers]
+
+import random
+import sys
+import time
+
+from slughorn.processor.ExpressionObjects import Number, Word
+from slughorn.processor.RuleEngine import RuleEngine
+from slughorn.processor.RuleGenerator import RuleGenerator
+
+
+def synthetic_expressions(amount_words, amount_numbers):
+    rng = random.Random(0)
+    syllables = ['ka', 'tze', 'hund', 'ber', 'lin', 'son', 'ne', 'mo', 'to', 'rad', 'fuss', 'ball']
+    words = [Word(''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3))) + str(i)) for i in range(amount_words)]
+    numbers = [Number(str(rng.randint(0, 99999)), rng.randint(1, 100)) for _ in range(amount_numbers)]
+    return {'words': words, 'numbers': numbers}
+
+
+if __name__ == '__main__':
+    amount_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    amount_words = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    expressions = synthetic_expressions(amount_words, amount_rules // 10)
+    for mangle in (False, True):
+        generator = RuleGenerator(expressions, 'benchmark', mangle=mangle)
+        generator.generate_rules()
+        print("l$1 kept with {} words: {}".format('mangled' if mangle else 'plain', 'l$1' in generator.final_rules))
+
+    generator = RuleGenerator(expressions, 'benchmark')
+    generator.generate_rules()
+    rules = generator.final_rules[:amount_rules]
+    words = [word.term for word in expressions['words']]
+    print("{} rules x {} words with {} workers".format(len(rules), len(words), workers))
+
+    engine = RuleEngine(rules, workers)
+    start = time.perf_counter()
+    unique, marginal = engine.measure_yield(words)
+    elapsed = time.perf_counter() - start
+    print("{:.1f}s, {:.1f} million rule applications per second".format(
+        elapsed, len(rules) * len(words) / elapsed / 1e6))
+    print("{} unique candidates, {} new".format(unique.sum(), marginal.sum()))
+    print("top rules by marginal yield: {}".format(engine.reordered_rules()[:10]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+# Compares the former scoring on nested word dictionaries (exceptionalism, frequency, pairwise combination of false
+# friends, score and Word objects for all words) with the columnar ExpressionScorer and its WordTable for a growing
+# vocabulary and amount of (mostly misdetected) languages.
+# Afterwards the combination of false friends alone is compared (former pairwise merge of all language pairs against
+# the grouped merge of ExpressionScorer) for up to 160 languages, where the pairwise merge grows quadratically.
+#
+# Usage: python benchmarks/bench_scoring.py [words of the largest vocabulary]
+
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from slughorn.processor.ExpressionObjects import Word
+from slughorn.processor.ExpressionScorer import ExpressionScorer
+from slughorn.processor.FrequencyCache import FrequencyCache
+
+LANGUAGES = ['de', 'en', 'fr', 'es', 'it', 'nl', 'pt', 'pl', 'sv', 'da', 'fi', 'cs', 'hu', 'ro', 'tr', 'id', 'ca',
+             'la', 'eo', 'tl', 'sw', 'ms', 'no', 'sk', 'sl', 'hr', 'et', 'lv', 'lt', 'gl', 'eu', 'cy', 'ga', 'is',
+             'af', 'sq', 'bs', 'lb', 'mt', 'br']
+WEIGHT = 0.5
+
+
+class Frequencies:
+    """
+    Frequencies looked up once in a FrequencyCache and kept in memory, so only the scoring is measured
+    """
+
+    def __init__(self, word_counts, frequency_cache):
+        self.frequencies = dict()
+        for language, counts in word_counts.items():
+            try:
+                self.frequencies[language] = dict(zip(counts, frequency_cache.get_frequencies(counts, language)))
+            except LookupError:
+                self.frequencies[language] = dict(zip(counts, frequency_cache.get_frequencies(counts, 'de')))
+
+    def get_frequencies(self, words, language):
+        frequencies = self.frequencies[language]
+        return [frequencies[word] for word in words]
+
+
+def old_combine_false_friends(word_dict):
+    for language1, words1 in word_dict.items():
+        for language2, words2 in word_dict.items():
+            if language1 == language2:
+                continue
+            for intersection in set(words1).intersection(set(words2)):
+                if words1[intersection]['exceptionalism'] > words2[intersection]['exceptionalism']:
+                    words1[intersection]['occurrences'] += words2[intersection]['occurrences']
+                    del words2[intersection]
+                else:
+                    words2[intersection]['occurrences'] += words1[intersection]['occurrences']
+                    del words1[intersection]
+
+
+def old_scoring(word_counts, frequencies):
+    word_dict = {language: {word: {'occurrences': occurrences} for word, occurrences in counts.items()}
+                 for language, counts in word_counts.items()}
+
+    highest_frequency = 0.0
+    for language, words in word_dict.items():
+        for attributes, frequency in zip(words.values(), frequencies.get_frequencies(words, language)):
+            attributes['exceptionalism'] = frequency
+            highest_frequency = max(highest_frequency, frequency)
+    for words in word_dict.values():
+        for attributes in words.values():
+            attributes['exceptionalism'] = 1 - (attributes['exceptionalism'] / highest_frequency)
+
+    total_amount_words = sum(attributes['occurrences'] for words in word_dict.values() for attributes in words.values())
+    highest_frequency = 0.0
+    for words in word_dict.values():
+        for attributes in words.values():
+            attributes['frequency'] = attributes['occurrences'] / total_amount_words
+            highest_frequency = max(highest_frequency, attributes['frequency'])
+    for words in word_dict.values():
+        for attributes in words.values():
+            attributes['frequency'] /= highest_frequency
+
+    old_combine_false_friends(word_dict)
+
+    for words in word_dict.values():
+        for attributes in words.values():
+            attributes['score'] = WEIGHT * attributes['exceptionalism'] + (1.0 - WEIGHT) * attributes['frequency']
+
+    final_word_list = [Word(term=word, occurrences=attributes['occurrences'], frequency=attributes['frequency'],
+                            exceptionalism=attributes['exceptionalism'], language=language, score=attributes['score'])
+                       for language, words in word_dict.items() for word, attributes in words.items()]
+    final_word_list.sort(key=lambda x: x.score, reverse=True)
+    return final_word_list
+
+
+def new_scoring(word_counts, frequencies):
+    scorer = ExpressionScorer(word_counts)
+    scorer.calculate_exceptionalism('de', frequencies)
+    scorer.calculate_frequency()
+    scorer.combine_false_friends()
+    scorer.calculate_score(WEIGHT)
+    return scorer.create_table(scorer.ranking())
+
+
+def create_word_counts(amount_languages, amount_words, rng):
+    # two large vocabularies (german and english) and smaller vocabularies of misdetected posts, the words are drawn
+    # zipf-like, so the common words appear in many languages
+    word_counts = dict()
+    languages = LANGUAGES[:amount_languages] if amount_languages <= len(LANGUAGES) else \
+        ['l{}'.format(i) for i in range(amount_languages)]
+    for i, language in enumerate(languages):
+        counts = Counter()
+        for _ in range(amount_words if i < 2 else amount_words // 50):
+            counts['w{}'.format(int((amount_words * 2) ** rng.random()))] += 1
+        word_counts[language] = counts
+    return word_counts
+
+
+if __name__ == '__main__':
+    largest_vocabulary = int(sys.argv[1]) if len(sys.argv) > 1 else 400000
+    rng = random.Random(0)
+    print("languages    words  old (s)  new (s)  speedup  identical")
+    with FrequencyCache(':memory:') as frequency_cache:
+        for amount_languages, amount_words in ((2, largest_vocabulary // 8), (10, largest_vocabulary // 4),
+                                               (20, largest_vocabulary // 2), (40, largest_vocabulary)):
+            word_counts = create_word_counts(amount_languages, amount_words, rng)
+            frequencies = Frequencies(word_counts, frequency_cache)
+
+            start = time.perf_counter()
+            old = old_scoring(word_counts, frequencies)
+            old_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            new = new_scoring(word_counts, frequencies)
+            new_time = time.perf_counter() - start
+
+            identical = [word.__getstate__() for word in old] == [word.__getstate__() for word in new]
+            print("{:9d}  {:7d}  {:7.2f}  {:7.2f}  {:6.1f}x  {}".format(amount_languages, len(old), old_time, new_time,
+                                                                       old_time / new_time, identical))
+
+    print()
+    print("false friends only")
+    print("languages    words  pairwise (s)  grouped (s)  speedup  identical")
+    for amount_languages in (2, 5, 10, 20, 40, 80, 160):
+        word_counts = create_word_counts(amount_languages, largest_vocabulary // 4, rng)
+        # ties of the exceptionalism are frequent, e.g. for words which are unknown in every language
+        exceptionalism = [rng.choice([0.5, 1.0, rng.random()]) for counts in word_counts.values() for _ in counts]
+        word_dict = dict()
+        rows = iter(exceptionalism)
+        for language, counts in word_counts.items():
+            word_dict[language] = {word: {'occurrences': occurrences, 'exceptionalism': next(rows)}
+                                   for word, occurrences in counts.items()}
+        scorer = ExpressionScorer(word_counts)
+        scorer.exceptionalism[:] = exceptionalism
+
+        start = time.perf_counter()
+        old_combine_false_friends(word_dict)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scorer.combine_false_friends()
+        new_time = time.perf_counter() - start
+
+        old = [(language, word, attributes['occurrences']) for language, words in word_dict.items()
+               for word, attributes in words.items()]
+        new = [(scorer.languages[scorer.language_ids[row]], scorer.terms[row], int(scorer.occurrences[row]))
+               for row in np.flatnonzero(scorer.active).tolist()]
+        print("{:9d}  {:7d}  {:12.3f}  {:11.3f}  {:6.1f}x  {}".format(amount_languages, len(exceptionalism), old_time,
+                                                                     new_time, old_time / new_time, old == new))
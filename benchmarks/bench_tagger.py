@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Compares tagging sentence by sentence (tag) with batched tagging (tag_sents) of the german classifier tagger on the
+# test split of the TIGER corpus, the same 10% split train_german_classifier.py evaluates the tagger on
+#
+# Usage: python benchmarks/bench_tagger.py tiger_release_aug07.corrected.16012013.conll09 [tagger.pkl]
+# Without a tagger pickle the model shipped in slughorn/processor/models is used.
+
+import os
+import pickle
+import random
+import sys
+import time
+
+import nltk
+
+from slughorn.processor.external_libraries.ClassifierBasedGermanTagger.ClassifierBasedGermanTagger import word_shape
+
+here = os.path.dirname(__file__)
+
+DEFAULT_TAGGER = os.path.join(here, '..', 'slughorn', 'processor', 'models', 'nltk_german_classifier_data.pkl')
+
+
+def load_test_sents(corpus_file):
+    corp = nltk.corpus.ConllCorpusReader(os.path.dirname(os.path.abspath(corpus_file)), os.path.basename(corpus_file),
+                                         ['ignore', 'words', 'ignore', 'ignore', 'pos'],
+                                         encoding='utf-8')
+    tagged_sents = list(corp.tagged_sents())
+    random.Random(0).shuffle(tagged_sents)
+    split_size = int(len(tagged_sents) * 0.1)
+    return tagged_sents[:split_size]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmarks/bench_tagger.py <TIGER conll09 file> [tagger.pkl]")
+
+    with open(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_TAGGER, 'rb') as f:
+        tagger = pickle.load(f)
+
+    test_sents = load_test_sents(sys.argv[1])
+    sentences = [[word for word, tag in sentence] for sentence in test_sents]
+    amount_tokens = sum(len(sentence) for sentence in sentences)
+    print("Tagging {} sentences with {} tokens".format(len(sentences), amount_tokens))
+
+    word_shape.cache_clear()
+    start = time.perf_counter()
+    single = [tagger.tag(sentence) for sentence in sentences]
+    single_time = time.perf_counter() - start
+    print("tag:       {:.2f}s ({:.0f} tokens/s)".format(single_time, amount_tokens / single_time))
+
+    word_shape.cache_clear()
+    start = time.perf_counter()
+    batched = tagger.tag_sents(sentences)
+    batched_time = time.perf_counter() - start
+    print("tag_sents: {:.2f}s ({:.0f} tokens/s)".format(batched_time, amount_tokens / batched_time))
+
+    print("speedup: {:.1f}x".format(single_time / batched_time))
+    print("identical tags: {}".format(single == batched))
+
+    correct = sum(predicted == gold for sentence, gold_sentence in zip(batched, test_sents)
+                  for (_, predicted), (_, gold) in zip(sentence, gold_sentence))
+    print("accuracy: {:.2%}".format(correct / amount_tokens))
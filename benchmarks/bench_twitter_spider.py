@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+# Compares the sequential and the concurrent scraping of the TwitterSpider against a local HTTP stand-in for the
+# search timeline, which adds a fixed latency to every request. It checks beforehand with the recorded pages of 2018 in
+# benchmarks/twitter_pages that the time range is split into consecutive windows, that the concurrent scraping returns
+# the tweets in the same order as the sequential one (newest first, or oldest first if chronological is set) and that
+# a tweet near a window boundary, which the stand-in serves in both windows, is only kept once.
+#
+# Usage: python benchmarks/bench_twitter_spider.py [recorded pages directory] [--workers 8] [--latency 0.05]
+# Without a directory, 2000 synthetic tweets over three years are served. A directory of recorded search timeline
+# pages (JSON files with 'items_html') is served by extracting their tweets with their ids and timestamps.
+
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from lxml import etree
+
+from slughorn.scraper.webspider.TwitterSpider import TwitterSpider, sanitize_text, split_time_range
+
+PAGE_SIZE = 20
+
+RECORDED_PAGES = os.path.join(os.path.dirname(__file__), 'twitter_pages')
+RECORDED_RANGE = ('2018-01-01', '2019-01-01')
+
+TWEET_HTML = ('<li data-item-type="tweet" data-item-id="{id}"><div>'
+              '<span class="_timestamp" data-time="{time}"></span>'
+              '<div class="js-tweet-text-container"><p>{text}</p></div></div></li>')
+
+
+def synthetic_tweets(amount=2000, start=datetime(2016, 1, 1, tzinfo=timezone.utc), days=3 * 365):
+    step = timedelta(days=days) / amount
+    return [(1000000 + i, int((start + i * step).timestamp()), 'Tweet {} über #slughorn'.format(i))
+            for i in range(amount)]
+
+
+def recorded_tweets(directory):
+    tweets = dict()
+    parser = etree.XMLParser(recover=True, encoding='utf8')
+    for file in glob.glob(os.path.join(directory, '*.json')):
+        with open(file, encoding='utf-8') as f:
+            items_html = json.load(f)['items_html'].strip().encode('utf8')
+        if not items_html:
+            continue
+        root = etree.fromstring(b'<ol>' + items_html + b'</ol>', parser=parser)
+        for item in root.xpath('//li[@data-item-type="tweet"]'):
+            timestamps = item.xpath('.//span[@data-time]')
+            texts = item.xpath('.//div[@class="js-tweet-text-container"]/p')
+            if timestamps and texts:
+                text = etree.tostring(texts[0], encoding='unicode', method='text')
+                tweets[int(item.get('data-item-id'))] = (int(timestamps[0].get('data-time')), text)
+    return [(tweet_id, timestamp, text) for tweet_id, (timestamp, text) in tweets.items()]
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    Serves the search timeline: tweets since <= time < until, newest first, PAGE_SIZE per page, paginated by id.
+    The search window is widened by overlap seconds on both sides, so a tweet near a window boundary is found in both
+    windows.
+    """
+    tweets = []
+    latency = 0.05
+    overlap = 0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        query = parse_qs(urlparse(self.path).query)
+        search = query['q'][0]
+        since = datetime.strptime(re.search(r'since:(\S{10})', search).group(1), '%Y-%m-%d')
+        until = datetime.strptime(re.search(r'until:(\S{10})', search).group(1), '%Y-%m-%d')
+        since, until = [int(date.replace(tzinfo=timezone.utc).timestamp()) for date in (since, until)]
+        since, until = since - self.overlap, until + self.overlap
+        max_position = query.get('max_position', [''])[0]
+
+        page = [tweet for tweet in self.tweets if since <= tweet[1] < until and
+                (not max_position or tweet[0] < int(max_position))][:PAGE_SIZE]
+        body = json.dumps({
+            'items_html': '\n'.join(TWEET_HTML.format(id=tweet_id, time=timestamp, text=text)
+                                    for tweet_id, timestamp, text in page),
+            'min_position': str(page[-1][0]) if page else max_position,
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(tweets, latency, overlap=0):
+    StandIn.tweets = sorted(tweets, key=lambda tweet: tweet[0], reverse=True)
+    StandIn.latency = latency
+    StandIn.overlap = overlap
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+
+def check_recorded_pages(window_days=30, workers=4):
+    from_date, to_date = RECORDED_RANGE
+    tweets = recorded_tweets(RECORDED_PAGES)
+    newest_first = [sanitize_text(text) for _, _, text in sorted(tweets, reverse=True)]
+    windows = split_time_range(from_date, to_date, window_days)
+    print("{} windows of {} days, consecutive from {} to {}: {}".format(
+        len(windows), window_days, from_date, to_date,
+        windows[0][0] == from_date and windows[-1][1] == to_date and
+        all(previous[1] == window[0] for previous, window in zip(windows, windows[1:]))))
+
+    server, base_url = start_stand_in(tweets, latency=0, overlap=24 * 60 * 60)
+    served = [tweet_id for window in windows
+              for tweet_id, _ in TwitterSpider('slughorn', from_date, to_date, base_url).get_items_of_window(*window)]
+    print("{} recorded tweets, {} served by the windows, {} of them in two windows".format(
+        len(tweets), len(served), len(served) - len(set(served))))
+    sequential = TwitterSpider('slughorn', from_date, to_date, base_url).get_tweets_from_profile()
+    print("sequential: every tweet once, newest first: {}".format(sequential == newest_first))
+    concurrent = TwitterSpider('slughorn', from_date, to_date, base_url).get_tweets_concurrently(workers, window_days)
+    print("concurrent: every tweet once, newest first: {}".format(concurrent == newest_first))
+    chronological = TwitterSpider('slughorn', from_date, to_date, base_url).get_tweets_concurrently(
+        workers, window_days, chronological=True)
+    print("concurrent chronological: every tweet once, oldest first: {}".format(chronological == newest_first[::-1]))
+    server.shutdown()
+
+
+def option(args, name, default):
+    if name in args:
+        index = args.index(name)
+        value = args[index + 1]
+        del args[index:index + 2]
+        return type(default)(value)
+    return default
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = option(args, '--workers', 8)
+    latency = option(args, '--latency', 0.05)
+    check_recorded_pages()
+
+    tweets = recorded_tweets(args[0]) if args else synthetic_tweets()
+    first = datetime.fromtimestamp(min(tweet[1] for tweet in tweets), timezone.utc)
+    last = datetime.fromtimestamp(max(tweet[1] for tweet in tweets), timezone.utc) + timedelta(days=1)
+    from_date, to_date = first.strftime('%Y-%m-%d'), last.strftime('%Y-%m-%d')
+
+    server, base_url = start_stand_in(tweets, latency)
+    print("Serving {} tweets from {} to {} with {:.0f} ms latency".format(len(tweets), from_date, to_date,
+                                                                          latency * 1000))
+
+    start = time.perf_counter()
+    sequential = TwitterSpider('slughorn', from_date, to_date, base_url).get_tweets_from_profile()
+    sequential_time = time.perf_counter() - start
+    print("sequential:  {:.2f}s, {} tweets".format(sequential_time, len(sequential)))
+
+    start = time.perf_counter()
+    concurrent = TwitterSpider('slughorn', from_date, to_date, base_url).get_tweets_concurrently(workers)
+    concurrent_time = time.perf_counter() - start
+    print("concurrent:  {:.2f}s, {} tweets with {} workers".format(concurrent_time, len(concurrent), workers))
+
+    print("speedup: {:.1f}x".format(sequential_time / concurrent_time))
+    print("identical tweets in the same order: {}".format(sequential == concurrent))
+    server.shutdown()
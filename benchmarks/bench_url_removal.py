@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+#
+# Compares URL_REGEX.sub on whole texts with remove_urls, which only applies the regex to candidate segments
+#
+# Usage: python benchmarks/bench_url_removal.py [twitter_*.pkl | facebook_*.pkl ...]
+# Without arguments a synthetic corpus of 50k posts is used.
+
+import itertools
+import random
+import sys
+import time
+
+from slughorn.processor.util import URL_REGEX, remove_urls
+from slughorn.scraper.util import load_posts
+
+WORDS = ["Heute", "war", "ein", "wunderschöner", "Tag", "am", "See", "danke", "Marathon", "4:12:33", "#running",
+         "@freund", "z.B.", "u.a.", "3.5", "1.000.000", "usw...", "Ende.Anfang", "e-mail@example.com", "...",
+         "www.example.fr/blog", "https://tickets.example.com/konzert?id=42", "http://192.168.0.1:8080/",
+         "bit.ly/2xYz", "Grüße", "😂", "Selbstverständlichkeitsüberprüfungsverfahren"]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        posts = list(itertools.chain.from_iterable(load_posts(file) for file in sys.argv[1:]))
+    else:
+        rng = random.Random(0)
+        posts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 60))) for _ in range(50000)]
+    amount_bytes = sum(len(post.encode('utf-8')) for post in posts)
+    print("Removing URLs from {} posts ({:.1f} MB)".format(len(posts), amount_bytes / 1e6))
+
+    start = time.perf_counter()
+    regex = [URL_REGEX.sub('', post) for post in posts]
+    regex_time = time.perf_counter() - start
+    print("URL_REGEX.sub: {:.2f}s ({:.0f} posts/s, {:.2f} MB/s)".format(regex_time, len(posts) / regex_time,
+                                                                        amount_bytes / 1e6 / regex_time))
+
+    start = time.perf_counter()
+    removed = [remove_urls(post) for post in posts]
+    removed_time = time.perf_counter() - start
+    print("remove_urls:   {:.2f}s ({:.0f} posts/s, {:.2f} MB/s)".format(removed_time, len(posts) / removed_time,
+                                                                        amount_bytes / 1e6 / removed_time))
+
+    print("speedup: {:.1f}x".format(regex_time / removed_time))
+    print("identical results: {}".format(regex == removed))
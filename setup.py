@@ -5,7 +5,7 @@ setup(
     version='0.3',
     packages=find_packages(),
     package_data={'slughorn.processor': ['models/lid.176.ftz', 'models/nltk_german_classifier_data.pkl'],
-                  'slughorn.processor.external_libraries.germalemma': ['data/lemmata.pkl'],
+                  'slughorn.processor.external_libraries.germalemma': ['data/lemmata.pkl', 'data/lemmata.store'],
                   'slughorn': ['logging.conf']},
     py_modules=['slughorn'],
     install_requires=[
@@ -21,8 +21,12 @@ setup(
         'pycountry >= 17.9.23',
         'nltk >= 3.2.5',
         'wordfreq >= 1.6.1',
-        'pyphen >= 0.9.4'
+        'pyphen >= 0.9.4',
+        'numpy >= 1.13.3'
     ],
+    extras_require={
+        'zstd': ['zstandard >= 0.9.0']
+    },
     dependency_links=['git+https://github.com/facebookresearch/fastText.git@master#egg=fastText-0.8.22'],
     entry_points={
         'console_scripts': ['slughorn=slughorn.cli:cli', 'slughorn_set=slughorn.cli:reset']
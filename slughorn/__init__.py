@@ -1,6 +1,7 @@
 import logging.config
 import os
 import pickle
+from itertools import islice
 
 import click
 
@@ -53,23 +54,24 @@ def start_facebook_scraper(user_name, case_id, output='', scrape_all=True, from_
     return facebook_scraper.posts
 
 
-def start_twitter_scraper(user_name, case_id, output='', scrape_all=True, from_date=None, to_date=None):
+def start_twitter_scraper(user_name, case_id, output='', scrape_all=True, from_date=None, to_date=None, workers=1):
     click.echo("Starting Twitter scraping for user '{}'. Why not get a tea? This could take some time!".format(
         user_name))
     if not output:
         output = "data/{}".format(case_id)
     twitter_scraper = TwitterScraper.TwitterScraper(user_name=user_name, case_id=case_id)
     if scrape_all:
-        twitter_scraper.scrape_all()
+        twitter_scraper.scrape_all(workers)
     elif from_date and to_date:
-        twitter_scraper.scrape_timeframe(from_date, to_date)
+        twitter_scraper.scrape_timeframe(from_date, to_date, workers)
     else:
         click.echo("No valid time frame or scrape_all flag for Twitter scraping.")
     twitter_scraper.write_to_file(directory=output)
     return twitter_scraper.tweets
 
 
-def start_processing(post_list, case_id, language, output='', pickled=True, weight=0.5):
+def start_processing(post_list, case_id, language, output='', pickled=True, weight=0.5, workers=1, incremental=True,
+                     lemma_cache_file=None, top=None, tail=False, binary=False, frequency_cache_file=None):
     import nltk
     nltk.download('stopwords')
     nltk.download('punkt')
@@ -77,22 +79,48 @@ def start_processing(post_list, case_id, language, output='', pickled=True, weig
         output = "data/{}".format(case_id)
     weight = float(weight)
     extractor = ExpressionExtractor.ExpressionExtractor(post_list, case_id, language)
-    extractor.extract_words_and_numbers(weight)
-    extractor.write_to_file(directory=output, pickled=pickled)
+    counters_file = os.path.join(output, 'counters.pkl')
+    if not incremental and os.path.isfile(counters_file):
+        os.remove(counters_file)
+    extractor.extract_words_and_numbers(weight, workers, counters_file, lemma_cache_file, top, frequency_cache_file)
+    if binary:
+        extractor.write_to_binary_file(directory=output)
+    else:
+        extractor.write_to_file(directory=output, pickled=pickled)
+    if tail:
+        extractor.write_tail_to_file(directory=output, pickled=pickled)
     return extractor.final_expressions
 
 
-def start_wordlist_generation(expressions, case_id, output=''):
+def start_wordlist_generation(expressions, case_id, output='', compression=None, mangle=False, dedup=None,
+                              false_positive_rate=0.001, shards=None, partition='round_robin', bloom_capacity=None):
     if not output:
         output = "data/{}".format(case_id)
-    generator = WordListGenerator.WordListGenerator(expressions, case_id)
+    generator = WordListGenerator.WordListGenerator(expressions, case_id, mangle, dedup=dedup,
+                                                    false_positive_rate=false_positive_rate,
+                                                    bloom_capacity=bloom_capacity)
     generator.generate_word_list()
-    generator.write_to_file(directory=output)
+    if shards:
+        generator.write_shards(shards, partition, directory=output, compression=compression)
+    else:
+        generator.write_to_file(directory=output, compression=compression)
+    return generator
 
 
-def start_rule_generation(expressions, case_id, output=''):
+def start_rule_generation(expressions, case_id, output='', compression=None, rule_yield=False, workers=1,
+                          max_rules=None, word_list_generator=None, rule_file=None, mangle=False):
     if not output:
         output = "data/{}".format(case_id)
-    generator = RuleGenerator.RuleGenerator(expressions, case_id)
-    generator.generate_rules()
-    generator.write_to_file(directory=output)
\ No newline at end of file
+    generator = RuleGenerator.RuleGenerator(expressions, case_id, max_rules, mangle)
+    if rule_file:
+        generator.read_rules(rule_file)
+    else:
+        generator.generate_rules()
+    if rule_yield:
+        # measure the yield on the word list the rules will be used with, e.g. the mangled candidates
+        words = None
+        if word_list_generator is not None:
+            words = islice(word_list_generator.word_list(), RuleGenerator.YIELD_WORDS)
+        generator.reorder_by_yield(words, workers=workers)
+        generator.write_yield_report(directory=output)
+    generator.write_to_file(directory=output, compression=compression)
\ No newline at end of file
@@ -1,12 +1,15 @@
 import glob
+import itertools
 import os
-import pickle
 
 import click
 
 from slughorn import start_processing, start_twitter_scraper, start_facebook_scraper, start_wordlist_generation, \
     start_rule_generation, set_constants
+from slughorn.processor import ExpressionStore
+from slughorn.processor.ExpressionExtractor import ExpressionExtractor
 from slughorn.scraper.constants_factory import constants_present, reset_constants
+from slughorn.scraper.util import load_posts
 
 ascii_slug = """
         _             _                      
@@ -20,8 +23,9 @@ ascii_slug = """
 """
 
 
-def ask_for_existing_files(type, directory):
-    files = glob.glob(os.path.join(directory, '{}_*.pkl'.format(type)))
+def ask_for_existing_files(type, directory, extensions=('pkl',)):
+    files = [file for extension in extensions
+             for file in glob.glob(os.path.join(directory, '{}_*.{}'.format(type, extension)))]
     if not files:
         return False, None
     else:
@@ -41,6 +45,16 @@ def validate_weight(ctx, param, value):
         raise click.BadParameter('Weight needs to be a value between 0.0 and 1.0')
 
 
+def validate_false_positive_rate(ctx, param, value):
+    try:
+        rate = float(value)
+        if rate <= 0.0 or rate >= 1.0:
+            raise click.BadParameter('False positive rate needs to be a value between 0.0 and 1.0')
+        return rate
+    except ValueError:
+        raise click.BadParameter('False positive rate needs to be a value between 0.0 and 1.0')
+
+
 @click.command()
 @click.option('-c', '--case_id', required=True, help="Case ID")
 @click.option('-f', '--facebook_username', default='', help="Target's Facebook user name")
@@ -48,9 +62,29 @@ def validate_weight(ctx, param, value):
 @click.option('-l', '--language', default='de', help="Expected language of postings, if detection fails (default: de)")
 @click.option('-o', '--output', default='', help="Path to output directory")
 @click.option('-w', '--weight', callback=validate_weight, default='0.5', help="Weight for the exceptionalism influencing the score (default: 0.5)")
+@click.option('-n', '--workers', default=1, type=click.IntRange(min=1), help="Number of worker processes for the extraction of words and numbers and the rule yield (default: 1)")
+@click.option('--scrape_workers', default=1, type=click.IntRange(min=1), help="Number of time windows of the Twitter history which are scraped concurrently (default: 1)")
+@click.option('--lemma_cache', default=None, help="Pickled lemma cache (e.g. of a previous case) to pre-warm the lemmatizer with, it is updated afterwards")
+@click.option('--frequency_cache', default=None, help="sqlite cache of the word frequencies which is shared by all cases (default: $XDG_CACHE_HOME/slughorn/wordfreq.sqlite or ~/.cache/slughorn/wordfreq.sqlite)")
+@click.option('--top', default=None, type=click.IntRange(min=1), help="Only keep the N words and N numbers with the highest score (default: all)")
+@click.option('--tail', is_flag=True, help="Write the ranked words and numbers beyond --top to a separate file")
+@click.option('--rebuild', is_flag=True, help="Process all posts again instead of only the ones which are new since the last run")
+@click.option('--binary', is_flag=True, help="Save the extracted expressions in the binary expression store format instead of pickle")
+@click.option('--mangle', is_flag=True, help="Generate password candidates (case and leetspeak variants, words with numbers, word pairs) in the order of their score instead of the plain word list")
+@click.option('--dedup', default=None, type=click.Choice(['exact', 'bloom']), help="Remove duplicate candidates from the word list, 'bloom' needs a fixed amount of memory but may drop a few new candidates")
+@click.option('--false_positive_rate', callback=validate_false_positive_rate, default='0.001', help="Probability that --dedup bloom drops a new candidate (default: 0.001)")
+@click.option('--bloom_capacity', default=None, type=click.IntRange(min=1), help="Expected amount of distinct candidates of --dedup bloom (default: the amount of candidates of the word list, at most 100000000)")
+@click.option('--shards', default=None, type=click.IntRange(min=1), help="Split the word list into N shards with a manifest for distributed cracking")
+@click.option('--partition', default='round_robin', type=click.Choice(['round_robin', 'hash']), help="Distribute the candidates over the shards round-robin by score (default) or by hash (disjoint shards)")
+@click.option('--rule_yield', is_flag=True, help="Measure how many new candidates every rule generates from the word list, order the rules by it and write a yield report")
+@click.option('--rule_file', default=None, type=click.Path(exists=True, dir_okay=False), help="Use the rules of a hashcat rule file instead of the generated rules, e.g. to measure their yield with --rule_yield")
+@click.option('--max_rules', default=None, type=click.IntRange(min=1), help="Only keep the N most likely rules, the BEST64 rules come first (default: all)")
+@click.option('--compress', default=None, type=click.Choice(['gzip', 'zstd']), help="Compress the word list and the rules (zstd requires the zstandard package)")
 @click.option('--txt', is_flag=True, help="Save intermediate results as txt instead of pickle (results cannot be reused)")
 @click.option('--delete_constants', is_flag=True, help="Delete the saved constants (including credentials)")
-def cli(case_id, facebook_username, twitter_username, language, output, weight, txt, delete_constants):
+def cli(case_id, facebook_username, twitter_username, language, output, weight, workers, scrape_workers, lemma_cache,
+        frequency_cache, top, tail, rebuild, binary, mangle, dedup, false_positive_rate, bloom_capacity, shards,
+        partition, rule_yield, rule_file, max_rules, compress, txt, delete_constants):
 
     click.echo(ascii_slug)
 
@@ -71,40 +105,43 @@ def cli(case_id, facebook_username, twitter_username, language, output, weight,
 
         expression_dict = dict()
 
-        use_file, file = ask_for_existing_files('expressions', output)
+        use_file, file = ask_for_existing_files('expressions', output, (ExpressionStore.EXTENSION, 'pkl'))
         if not use_file:
 
-            post_list = []
+            post_sources = []
 
             if facebook_username:
                 use_file, file = ask_for_existing_files('facebook', output)
                 if not use_file:
-                    facebook_posts = start_facebook_scraper(facebook_username, case_id, output)
+                    post_sources.append(start_facebook_scraper(facebook_username, case_id, output))
                 else:
-                    with open(file, 'rb') as f:
-                        facebook_posts = pickle.load(f)
-                post_list.extend(facebook_posts)
+                    post_sources.append(load_posts(file))
             if twitter_username:
                 use_file, file = ask_for_existing_files('twitter', output)
                 if not use_file:
-                    twitter_tweets = start_twitter_scraper(twitter_username, case_id, output)
+                    post_sources.append(start_twitter_scraper(twitter_username, case_id, output,
+                                                              workers=scrape_workers))
                 else:
-                    with open(file, 'rb') as f:
-                        twitter_tweets = pickle.load(f)
-                post_list.extend(twitter_tweets)
-
-            if len(post_list) > 0:
-                expression_dict = start_processing(post_list, case_id, language, output, not txt, weight)
+                    post_sources.append(load_posts(file))
+
+            # posts from existing files are read lazily, peek at the first one to find out if there are any
+            posts = itertools.chain.from_iterable(post_sources)
+            first_post = next(posts, None)
+            if first_post is not None:
+                expression_dict = start_processing(itertools.chain([first_post], posts), case_id, language, output,
+                                                   not txt, weight, workers, not rebuild, lemma_cache, top, tail,
+                                                   binary, frequency_cache)
             else:
                 click.echo("No posts found. Please try again ...")
 
         else:
-            with open(file, 'rb') as f:
-                expression_dict = pickle.load(f)
+            expression_dict = ExpressionExtractor.read_from_file(file)
 
         if len(expression_dict) > 0:
-            start_wordlist_generation(expression_dict, case_id, output)
-            start_rule_generation(expression_dict, case_id, output)
+            word_list_generator = start_wordlist_generation(expression_dict, case_id, output, compress, mangle, dedup,
+                                                            false_positive_rate, shards, partition, bloom_capacity)
+            start_rule_generation(expression_dict, case_id, output, compress, rule_yield, workers, max_rules,
+                                  word_list_generator, rule_file, mangle)
             click.echo("slughorn finished. Happy cracking!")
         else:
             click.echo("No words found. Please try again ...")
@@ -0,0 +1,279 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+log = logging.getLogger('slughorn')
+
+# size of the write buffer of output files
+BUFFER_SIZE = 1024 * 1024
+
+# file extension of every supported compression
+COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+# extension of files which are still being written
+PART_EXTENSION = '.part'
+
+# amount of lines per part file of a shard
+SHARD_PART_SIZE = 1000000
+
+# amount of chunks which are queued per shard before the producer waits for the writer thread
+SHARD_QUEUE_SIZE = 8
+
+PARTITIONS = ('round_robin', 'hash')
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def check_compression(compression):
+    """
+    Raises a ValueError if the compression is unknown or not available.
+
+    :param compression: None, 'gzip' or 'zstd'
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression {}".format(compression))
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+
+
+class OutputFile:
+    """
+    An OutputFile object streams the output of slughorn into a file.
+
+    The output is written through a large buffer (and optionally compressed) into a temporary '.part' file, which is
+    renamed to its final name only after it was written completely. So partially written files are never picked up as
+    existing results. The written bytes per second are logged when the file is closed.
+
+    Usage:
+        with OutputFile(file) as f:
+            f.write(...)
+    """
+
+    def __init__(self, file, binary=False, compression=None, report=True):
+        """
+        Init method of the OutputFile Class
+
+        :param file: Path of the file, the extension of the compression is appended
+        :param binary: Whether bytes (e.g. a pickle) or text is written
+        :param compression: Optional compression, 'gzip' or 'zstd' (requires the zstandard package)
+        :param report: Whether the throughput is logged (at info level, otherwise at debug level)
+        """
+        check_compression(compression)
+        self.file = file
+        self.path = file + COMPRESSIONS.get(compression, '')
+        self.part_path = self.path + PART_EXTENSION
+        self.binary = binary
+        self.compression = compression
+        self.report = report
+        self.streams = []
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        stream = open(self.part_path, 'wb', buffering=BUFFER_SIZE)
+        self.streams.append(stream)
+        if self.compression == 'gzip':
+            stream = gzip.GzipFile(filename=os.path.basename(self.file), fileobj=stream, mode='wb')
+            self.streams.append(stream)
+        elif self.compression == 'zstd':
+            stream = zstandard.ZstdCompressor().stream_writer(stream)
+            self.streams.append(stream)
+        if not self.binary:
+            stream = io.TextIOWrapper(stream, encoding='utf-8')
+            self.streams.append(stream)
+        return stream
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # close the outermost stream first, so everything is flushed into the file
+        for stream in reversed(self.streams):
+            if not stream.closed:
+                stream.close()
+
+        if exc_type is not None:
+            # the part file does not exist if it could not be opened
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            return False
+
+        os.replace(self.part_path, self.path)
+        elapsed = time.perf_counter() - self.start
+        size = os.path.getsize(self.path)
+        log.log(logging.INFO if self.report else logging.DEBUG,
+                "Wrote {:.1f} MB in {:.2f}s ({:.1f} MB/s) to {}".format(size / 1e6, elapsed,
+                                                                       size / 1e6 / max(elapsed, 1e-9), self.path))
+        return False
+
+
+def file_checksum(path):
+    """
+    :param path: Path of a file
+    :return: Hex SHA-256 of the file
+    """
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BUFFER_SIZE), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+class ShardedOutput:
+    """
+    A ShardedOutput object distributes lines (e.g. password candidates) over several shards, which are written in
+    parallel by one thread per shard.
+
+    The lines are partitioned either round-robin by their rank, so every shard gets high-value lines early, or by the
+    CRC32 of the line, so identical lines end up in the same shard and the shards are disjoint.
+    Every shard is written as a sequence of part files of at most part_size lines. Every part file is renamed to its
+    final name when it is complete and then added to the manifest.json of the directory with its amount of lines and
+    its SHA-256, so consumers can start with the completed parts while the output is still written. The manifest is
+    replaced atomically and marked as complete at the end.
+
+    Usage:
+        with ShardedOutput(directory, 4) as output:
+            output.write(lines)
+    """
+
+    def __init__(self, directory, shards, partition='round_robin', compression=None, part_size=SHARD_PART_SIZE):
+        """
+        Init method of the ShardedOutput Class
+
+        :param directory: Directory of the part files and the manifest
+        :param shards: Amount of shards
+        :param partition: 'round_robin' (by rank) or 'hash' (disjoint shards)
+        :param compression: Optional compression of the part files, 'gzip' or 'zstd'
+        :param part_size: Maximum amount of lines per part file
+        """
+        if partition not in PARTITIONS:
+            raise ValueError("Unknown partition {}".format(partition))
+        if shards < 1:
+            raise ValueError("At least one shard is needed")
+        # fail early instead of in the writer threads
+        check_compression(compression)
+
+        self.directory = directory
+        self.shards = shards
+        self.partition = partition
+        self.compression = compression
+        self.part_size = part_size
+        self.rank = 0
+        self.manifest = {'partition': partition, 'compression': compression, 'complete': False,
+                         'shards': [{'shard': shard, 'lines': 0, 'parts': []} for shard in range(shards)]}
+        self.lock = threading.Lock()
+        self.queues = [queue.Queue(maxsize=SHARD_QUEUE_SIZE) for _ in range(shards)]
+        self.threads = [threading.Thread(target=self.write_shard, args=(shard,), daemon=True)
+                        for shard in range(shards)]
+        self.errors = []
+
+    def __enter__(self):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        self.write_manifest()
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for shard_queue in self.queues:
+            shard_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+        if exc_type is not None:
+            return False
+        if self.errors:
+            raise self.errors[0]
+
+        with self.lock:
+            self.manifest['complete'] = True
+            self.write_manifest()
+        log.info("Wrote {} lines in {} shards to {}".format(sum(shard['lines'] for shard in self.manifest['shards']),
+                                                            self.shards, self.directory))
+        return False
+
+    def write(self, lines):
+        """
+        Distributes lines over the shards.
+
+        :param lines: List of strings without line breaks, in the order of their rank
+        """
+        if self.errors:
+            raise self.errors[0]
+        if self.partition == 'round_robin':
+            parts = [lines[(shard - self.rank) % self.shards::self.shards] for shard in range(self.shards)]
+        else:
+            parts = [[] for _ in range(self.shards)]
+            for line in lines:
+                parts[zlib.crc32(line.encode('utf-8')) % self.shards].append(line)
+        self.rank += len(lines)
+
+        for shard_queue, part in zip(self.queues, parts):
+            if part:
+                shard_queue.put(part)
+
+    def write_shard(self, shard):
+        """
+        Writes the lines of a shard from its queue into part files until None is received. Runs in its own thread.
+
+        :param shard: Index of the shard
+        """
+        shard_queue = self.queues[shard]
+        part_file = None
+        try:
+            amount_lines = 0
+            for lines in iter(shard_queue.get, None):
+                while lines:
+                    if part_file is None:
+                        path = os.path.join(self.directory, 'shard_{:03d}_part_{:05d}.txt'.format(
+                            shard, len(self.manifest['shards'][shard]['parts'])))
+                        part_file = OutputFile(path, compression=self.compression, report=False)
+                        f = part_file.__enter__()
+                        amount_lines = 0
+                    batch, lines = lines[:self.part_size - amount_lines], lines[self.part_size - amount_lines:]
+                    f.write("\n".join(batch))
+                    f.write("\n")
+                    amount_lines += len(batch)
+                    if amount_lines == self.part_size:
+                        part_file.__exit__(None, None, None)
+                        path, part_file = part_file.path, None
+                        self.add_part(shard, path, amount_lines)
+            if part_file is not None:
+                part_file.__exit__(None, None, None)
+                path, part_file = part_file.path, None
+                self.add_part(shard, path, amount_lines)
+        except Exception as e:
+            log.error("Writing shard {} failed: {}".format(shard, e))
+            self.errors.append(e)
+            try:
+                if part_file is not None:
+                    part_file.__exit__(type(e), e, e.__traceback__)
+            except OSError as cleanup_error:
+                log.warning("Could not remove the part file of shard {}: {}".format(shard, cleanup_error))
+            finally:
+                # keep consuming, so the producer is not blocked
+                for _ in iter(shard_queue.get, None):
+                    pass
+
+    def add_part(self, shard, path, amount_lines):
+        checksum = file_checksum(path)
+        with self.lock:
+            shard_manifest = self.manifest['shards'][shard]
+            shard_manifest['parts'].append({'file': os.path.basename(path), 'lines': amount_lines,
+                                            'sha256': checksum})
+            shard_manifest['lines'] += amount_lines
+            self.write_manifest()
+
+    def write_manifest(self):
+        with OutputFile(os.path.join(self.directory, MANIFEST_FILE), report=False) as f:
+            json.dump(self.manifest, f, indent=2)
@@ -0,0 +1,203 @@
+"""
+Filters to remove duplicate password candidates from a stream of candidates.
+
+ExactFilter remembers every candidate in a set, so it never drops a new candidate but needs memory for every distinct
+candidate. BloomFilter has a fixed size which is calculated from the expected amount of candidates and the accepted
+false positive rate: a new candidate is dropped with (at most) this probability, but the memory does not grow.
+"""
+
+import logging
+import math
+import sys
+from hashlib import blake2b
+
+import numpy as np
+
+log = logging.getLogger('slughorn')
+
+# amount of candidates which are checked at once
+DEDUPLICATION_CHUNK_SIZE = 65536
+
+DEDUPLICATION_MODES = ('exact', 'bloom')
+
+# size of the BLAKE2b digest of a candidate, its two halves are the hashes of the Bloom filter
+DIGEST_SIZE = 16
+
+
+def candidate_digests(candidates):
+    """
+    :param candidates: Iterable of candidates
+    :return: Concatenated BLAKE2b digests of the candidates, e.g. to add them to a BloomFilter in another process
+    """
+    return b''.join(blake2b(candidate.encode('utf-8'), digest_size=DIGEST_SIZE).digest() for candidate in candidates)
+
+
+class ExactFilter:
+    """
+    Remembers every candidate in a set.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.string_size = 0
+
+    def add_many(self, candidates):
+        """
+        :param candidates: List of distinct candidates
+        :return: List of booleans, True for every candidate which was not seen before
+        """
+        new = []
+        for candidate in candidates:
+            if candidate in self.seen:
+                new.append(False)
+            else:
+                self.seen.add(candidate)
+                self.string_size += sys.getsizeof(candidate)
+                new.append(True)
+        return new
+
+    def memory_size(self):
+        """
+        :return: Size of the set and the remembered strings in bytes
+        """
+        return sys.getsizeof(self.seen) + self.string_size
+
+
+class BloomFilter:
+    """
+    A Bloom filter with a fixed size bit array.
+
+    Every candidate is hashed once with BLAKE2b, the two halves of the digest are combined to the positions of its bits
+    (double hashing). The bits of a chunk of candidates are tested and set at once with NumPy. The digests can be
+    computed in other processes (see candidate_digests and add_digests).
+    """
+
+    def __init__(self, capacity, false_positive_rate=0.001):
+        """
+        Init method of the BloomFilter Class
+
+        :param capacity: Expected amount of distinct candidates, more candidates increase the false positive rate
+        :param false_positive_rate: Probability that a new candidate is taken as a duplicate at the given capacity
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("The false positive rate needs to be a value between 0.0 and 1.0")
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.amount_bits = max(64, int(math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)))
+        self.amount_hashes = max(1, int(round(self.amount_bits / max(capacity, 1) * math.log(2))))
+        self.bits = np.zeros((self.amount_bits + 7) // 8, dtype=np.uint8)
+        self.hash_offsets = np.arange(self.amount_hashes, dtype=np.uint64)
+        self.amount_added = 0
+
+    def positions(self, digests):
+        """
+        :param digests: Concatenated digests of the candidates (see candidate_digests)
+        :return: Bit positions, one row of amount_hashes positions per candidate
+        """
+        hashes = np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+        # overflows wrap around, which does not matter for hashing
+        return (hashes[:, :1] + self.hash_offsets * hashes[:, 1:]) % np.uint64(self.amount_bits)
+
+    @staticmethod
+    def bytes_and_masks(positions):
+        """
+        :param positions: Array of bit positions
+        :return: Byte indices and bit masks of the positions
+        """
+        return (positions >> np.uint64(3)).astype(np.intp), np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)
+
+    def add_many(self, candidates):
+        """
+        :param candidates: List of distinct candidates
+        :return: Boolean array, True for every candidate which was (probably) not seen before
+        """
+        return self.add_digests(candidate_digests(candidates))
+
+    def add_digests(self, digests):
+        """
+        :param digests: Concatenated digests of distinct candidates (see candidate_digests)
+        :return: Boolean array, True for every candidate which was (probably) not seen before
+        """
+        if not digests:
+            return np.zeros(0, dtype=bool)
+        positions = self.positions(digests)
+        indices, masks = self.bytes_and_masks(positions)
+        new = ~np.all(self.bits[indices] & masks, axis=1)
+        # the bits of one byte are combined first, sorting is much faster than np.bitwise_or.at
+        indices, masks = self.bytes_and_masks(np.sort(positions[new], axis=None))
+        starts = np.flatnonzero(np.concatenate(([True], indices[1:] != indices[:-1])))
+        if len(indices):
+            self.bits[indices[starts]] |= np.bitwise_or.reduceat(masks, starts)
+
+        if self.amount_added <= self.capacity < self.amount_added + np.count_nonzero(new):
+            log.warning("More than {} distinct candidates, the false positive rate of the Bloom filter exceeds "
+                        "{}".format(self.capacity, self.false_positive_rate))
+        self.amount_added += int(np.count_nonzero(new))
+        return new
+
+    def memory_size(self):
+        """
+        :return: Size of the bit array in bytes
+        """
+        return self.bits.nbytes
+
+
+class Deduplicator:
+    """
+    A Deduplicator object removes the duplicates from a stream of candidates, the first appearance of every candidate
+    is kept. It counts the candidates and the duplicates for the report.
+    """
+
+    def __init__(self, mode='exact', capacity=100000000, false_positive_rate=0.001,
+                 chunk_size=DEDUPLICATION_CHUNK_SIZE):
+        """
+        Init method of the Deduplicator Class
+
+        :param mode: 'exact' (set of all candidates) or 'bloom' (memory-bounded, may drop new candidates)
+        :param capacity: Expected amount of distinct candidates of the Bloom filter
+        :param false_positive_rate: False positive rate of the Bloom filter at the given capacity
+        :param chunk_size: Amount of candidates which are checked at once
+        """
+        if mode == 'exact':
+            self.filter = ExactFilter()
+        elif mode == 'bloom':
+            self.filter = BloomFilter(capacity, false_positive_rate)
+        else:
+            raise ValueError("Unknown deduplication mode {}".format(mode))
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.amount_candidates = 0
+        self.amount_duplicates = 0
+
+    def deduplicate(self, candidates):
+        """
+        :param candidates: Iterable of candidate strings
+        :return: Generator of the candidates without duplicates, in the same order
+        """
+        chunk = []
+        for candidate in candidates:
+            chunk.append(candidate)
+            if len(chunk) >= self.chunk_size:
+                yield from self.deduplicate_chunk(chunk)
+                chunk = []
+        yield from self.deduplicate_chunk(chunk)
+
+    def deduplicate_chunk(self, chunk):
+        # duplicates within the chunk are removed exactly, the filter only gets distinct candidates
+        distinct = list(dict.fromkeys(chunk))
+        new = self.filter.add_many(distinct)
+        result = [candidate for candidate, is_new in zip(distinct, new) if is_new]
+        self.amount_candidates += len(chunk)
+        self.amount_duplicates += len(chunk) - len(result)
+        return result
+
+    def duplicate_rate(self):
+        return self.amount_duplicates / self.amount_candidates if self.amount_candidates else 0.0
+
+    def report(self):
+        """
+        Logs the amount of candidates, the duplicate rate and the memory footprint of the filter.
+        """
+        log.info("Deduplication ({}): {} of {} candidates were duplicates ({:.2%}), filter uses {:.1f} MB".format(
+            self.mode, self.amount_duplicates, self.amount_candidates, self.duplicate_rate(),
+            self.filter.memory_size() / 1e6))
@@ -1,19 +1,30 @@
+import hashlib
+import heapq
 import logging
+import multiprocessing
 import os
 import pickle
-from collections import defaultdict
+from collections import defaultdict, deque, namedtuple, Counter
 from datetime import datetime
+from operator import itemgetter
 
 import click
+import click_spinner
 import fastText
+import nltk
 import pycountry
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from wordfreq import word_frequency
 
-from slughorn.processor.ExpressionObjects import Word, Number
+from slughorn.output import OutputFile
+from slughorn.processor import ExpressionStore
+from slughorn.processor.ExpressionObjects import NumberTable, WordTable
+from slughorn.processor.ExpressionScorer import ExpressionScorer
+from slughorn.processor.FrequencyCache import FrequencyCache
+from slughorn.processor.LemmaCache import LemmaCache
 from slughorn.processor.external_libraries.germalemma.germalemma import GermaLemma
-from slughorn.processor.util import URL_REGEX, VALID_UNICODES, ADDITIONAL_STOPWORDS, UNSUPPORTED_LANGS
+from slughorn.processor.util import CLEANING_TABLE, ADDITIONAL_STOPWORDS, UNSUPPORTED_LANGS, chunks, \
+    remove_urls
 
 log = logging.getLogger('slughorn')
 
@@ -24,7 +35,22 @@ LANGUAGE_MODEL = fastText.load_model(os.path.join(here, 'models', 'lid.176.ftz')
 with open(os.path.join(here, 'models', 'nltk_german_classifier_data.pkl'), 'rb') as f:
     tagger = pickle.load(f)
 
-lemmatizer = GermaLemma(pickle=os.path.join(here, 'external_libraries', 'germalemma', 'data', 'lemmata.pkl'))
+# the memory-mapped lemmata store is shared by all processes, the pickle is loaded if there is no store
+lemmata_store = os.path.join(here, 'external_libraries', 'germalemma', 'data', 'lemmata.store')
+if os.path.isfile(lemmata_store):
+    lemmatizer = LemmaCache(GermaLemma(store=lemmata_store))
+else:
+    lemmatizer = LemmaCache(GermaLemma(pickle=os.path.join(here, 'external_libraries', 'germalemma', 'data',
+                                                          'lemmata.pkl')))
+
+# amount of posts which are submitted to fastText in a single predict call
+LANGUAGE_DETECTION_CHUNK_SIZE = 10000
+
+# version of the persisted raw counters, counters of other versions are not reused
+COUNTERS_VERSION = 1
+
+# amount of Word or Number objects which are created and written at once for the ranked tail
+TAIL_CHUNK_SIZE = 10000
 
 
 def detect_language(text, expected_language):
@@ -47,37 +73,79 @@ def detect_language(text, expected_language):
     return language_code
 
 
+def detect_languages(texts, expected_language):
+    """
+    Detects the languages of a list of texts
+
+    Batched version of detect_language: all texts are submitted to fastText in a single predict call, which avoids
+    the per-call overhead for large amounts of posts. The result is the same as calling detect_language for every
+    text.
+
+    :param texts: List of texts
+    :param expected_language: Language code which is used for unsupported languages
+    :return: List of alpha_2 language codes in the same order as texts
+    """
+    if not texts:
+        return []
+    language_labels, probabilities = LANGUAGE_MODEL.predict([text.replace('\n', ' ') for text in texts], k=1)
+
+    language_codes = []
+    for language_label in language_labels:
+        language_code = language_label[0].replace('__label__', '')
+        # Japanese, Korean and Chinese is not supported yet
+        if language_code in UNSUPPORTED_LANGS:
+            language_code = expected_language
+        language_codes.append(language_code)
+    return language_codes
+
+
 def clean_text(text):
     """
     Removes special characters from text
+
+    Removes URLs, replaces the separator characters by spaces and removes all characters which are no valid unicodes
+    in a single str.translate pass.
     
     :param text: Text to be cleaned
     :return: Cleaned text
     """
-    cleaned_text = URL_REGEX.sub('', text)  # remove URLs
-    ugly_characters = ['-', '_', '+', '>', '<', '*', '/', ]
-    for character in ugly_characters:
-        cleaned_text = cleaned_text.replace(character, ' ')
+    return remove_urls(text).translate(CLEANING_TABLE)
 
-    #bad_characters = ['„', '“', '`', "'", '´', ',', '.', '…', '‚', '‘', '‘', '’', '«', '»', '‹', '›']
-    # for character in bad_characters:
-    #     cleaned_text = cleaned_text.replace(character, '')
-    cleaned_text = "".join(i for i in cleaned_text if ord(i) in VALID_UNICODES)
 
-    return cleaned_text
+LanguageResources = namedtuple('LanguageResources', ['language_name', 'stop_words', 'sentence_tokenizer'])
 
+# (language code, expected language) -> LanguageResources, filled by get_language_resources
+language_resources = dict()
 
-def remove_stopwords(text, language_code, expected_language):
+
+def load_sentence_tokenizer(language_name):
     """
-    Removes stopwords from text
+    Loads the punkt sentence tokenizer of a language, word_tokenize uses the same tokenizer.
+
+    :param language_name: Name of the language (e.g. 'german')
+    :return: punkt tokenizer of the language or of english if there is none for the language
+    """
+    try:
+        return nltk.data.load('tokenizers/punkt/{}.pickle'.format(language_name))
+    except LookupError:
+        log.info("Tokenizer for {} not found, using english tokenizer instead.".format(language_name))
+        return nltk.data.load('tokenizers/punkt/english.pickle')
+
+
+def get_language_resources(language_code, expected_language):
+    """
+    Returns the name, the stopwords and the sentence tokenizer of a language.
+
+    The resources are only built for the first text of a language, all further texts just look them up.
 
-    Removes all stopwords in the language of the text and returns all words which are longer than 1 character
-    together as a list
-    :param text: Text the stopwords will be removed from
     :param language_code: Language Code (alpha_2, e.g. 'en') of the text
     :param expected_language: expected language if detected language is not in pycountry
-    :return: List of non-stopwords longer than 2 character
+    :return: LanguageResources of the language
     """
+    key = (language_code, expected_language)
+    if key in language_resources:
+        return language_resources[key]
+
     try:
         if len(language_code) == 2:
             language_name = pycountry.languages.get(alpha_2=language_code).name.lower()
@@ -90,20 +158,41 @@ def remove_stopwords(text, language_code, expected_language):
     try:
         stop_words = set(stopwords.words(language_name))
     except OSError:
-        log.debug("No stopwords available for this language.")
+        log.debug("No stopwords available for {}.".format(language_name))
         stop_words = set()
 
     stop_words.update(['``', "''"])  # add double quotes because of weird facebook encoding
     additional_stopwords = ADDITIONAL_STOPWORDS.get(language_name, [])
     stop_words.update(additional_stopwords)
 
-    try:
-        words = word_tokenize(text, language=language_name)
-    except LookupError:
-        log.debug("Tokenizer for {} not found, using english tokenizer instead.".format(language_name))
-        words = word_tokenize(text, language='english')
+    resources = LanguageResources(language_name, frozenset(stop_words), load_sentence_tokenizer(language_name))
+    language_resources[key] = resources
+    return resources
+
 
-    filtered_strings = [word.lower() for word in words if word.lower() not in stop_words and len(word) > 2]
+def remove_stopwords(text, language_code, expected_language):
+    """
+    Removes stopwords from text
+
+    Removes all stopwords in the language of the text and returns all words which are longer than 1 character
+    together as a list
+    :param text: Text the stopwords will be removed from
+    :param language_code: Language Code (alpha_2, e.g. 'en') of the text
+    :param expected_language: expected language if detected language is not in pycountry
+    :return: List of non-stopwords longer than 2 character
+    """
+    resources = get_language_resources(language_code, expected_language)
+    stop_words = resources.stop_words
+
+    # same as word_tokenize(text, language=resources.language_name), but without loading the tokenizer again
+    words = [word for sentence in resources.sentence_tokenizer.tokenize(text)
+             for word in word_tokenize(sentence, preserve_line=True)]
+
+    filtered_strings = []
+    for word in words:
+        lower_word = word.lower()
+        if lower_word not in stop_words and len(word) > 2:
+            filtered_strings.append(lower_word)
     return filtered_strings
 
 
@@ -134,174 +223,231 @@ def lemmatize_words(text):
     :param text: Text
     :return: list of lemmatized words
     """
-    word_list = text.split()
-    tagged_words = tagger.tag(word_list)
+    return lemmatize_texts([text])[0]
 
-    base_words = []
 
-    for word in tagged_words:
-        try:
-            lemma = lemmatizer.find_lemma(word[0], word[1])
-        except ValueError:
-            lemma = word[0]
-        base_words.append(lemma)
-    return base_words
+def lemmatize_texts(texts):
+    """
+    Lemmatizes the german words of many texts at once (see lemmatize_words).
 
+    All texts are tagged in a single batch, which is a lot faster than tagging them one by one.
 
-def calculate_exceptionalism(word_dict, expected_language):
+    :param texts: List of texts
+    :return: list of lists of lemmatized words, one per text
     """
-    Detects how common the words are in their language using 'wordfreq'
-    word_frequency returns the share the word has in the language, with 1 if there is only one word in the corpus and 0
-    being an unknown word.
-    The value is Min-Max scaled by dividing it by the value of the word with the highest commonness.
-    To get the exceptionalism of a word the value is substracted from 1.
-        
-    :param word_dict: dictionary of words
-    :param expected_language: expected language if detected language is not in wordfreq
-    :return: 
-    """
-    highest_frequency = 0.0
-    highest_word = ""
-    with click.progressbar(word_dict.items(), label='Calculating exceptionalism', show_eta=False) as bar:
-        for language, words in bar:
-            for word, attributes in words.items():
-                try:
-                    frequency = word_frequency(word, language, wordlist='large')
-                except LookupError:
-                    log.debug("Language code {} not found in wordfreq. Using {} instead.".format(language, expected_language))
-                    frequency = word_frequency(word, expected_language, wordlist='large')
-                attributes['exceptionalism'] = frequency
-                # save highest frequency for Min-Max Scaling
-                if frequency > highest_frequency:
-                    highest_frequency = frequency
-                    highest_word = word
-
-    # perform Min-Max Scaling (dividing by the maximum value appearing)
-    #click.echo("Highest Frequency (exc): {} {}".format(highest_frequency, highest_word))
-    for language, words in word_dict.items():
-        for word, attributes in words.items():
-            attributes['exceptionalism'] = 1 - (attributes['exceptionalism'] / highest_frequency)
-
-
-def calculate_frequency(word_dict):
-    """
-    Calculates how often the words is used in all postings of the target person.
-    The amount of occurrences of every word is divided by the amount of all words together. This results in the share of
-    this word.
-    The value is Min-Max scaled by dividing it by the value of the word with the highest share.
-    
-    :param word_dict: dictionary of words
-    :return: 
-    """
-    total_amount_words = 0
-    for language, words in word_dict.items():
-        for word, attributes in words.items():
-            total_amount_words += attributes['occurrences']
-
-    #click.echo("total amount of words: {}".format(total_amount_words))
-    highest_frequency = 0.0
-    highest_word = ''
-    with click.progressbar(word_dict.items(), label='Calculating frequency', show_eta=False) as bar:
-        for language, words in bar:
-            for word, attributes in words.items():
-                frequency = attributes['occurrences'] / total_amount_words
-                attributes['frequency'] = frequency
-                # save highest frequency for Min-Max Scaling
-                if frequency > highest_frequency:
-                    highest_frequency = frequency
-                    highest_word = word
-
-    # perform Min-Max Scaling (dividing by the maximum value appearing)
-    #click.echo("Highest Frequency: {} {}".format(highest_frequency, highest_word))
-    for language, words in word_dict.items():
-        for word, attributes in words.items():
-            attributes['frequency'] /= highest_frequency
-
-
-def calculate_score(word_dict, exceptionalism_weight):
-    """
-    Calculates the score of each word.
-    The score of word is the product of its exceptionalism and its number of occurrences. A higher value means that 
-    the word is a better candidate for a password.
-    
-    :param word_dict: dictionary of words
-    :return:
+    tagged_texts = tagger.tag_sents([text.split() for text in texts])
+
+    lemmatized_texts = []
+    for tagged_words in tagged_texts:
+        base_words = []
+        for word in tagged_words:
+            try:
+                lemma = lemmatizer.find_lemma(word[0], word[1])
+            except ValueError:
+                lemma = word[0]
+            base_words.append(lemma)
+        lemmatized_texts.append(base_words)
+    return lemmatized_texts
+
+
+def count_expressions(texts, expected_language):
     """
-    frequency_weight = 1.0 - exceptionalism_weight
-    with click.progressbar(word_dict.items(), label='Calculating score', show_eta=False) as bar:
-        for language, words in bar:
-            for word, attributes in words.items():
-                attributes['score'] = exceptionalism_weight * attributes['exceptionalism'] + frequency_weight * attributes['frequency']
+    Filters a list of texts and counts the remaining words and numbers.
 
+    Detects the languages of all texts and tags all german texts at once, then cleans, lemmatizes (german only) and
+    removes the stopwords of every text. This is the work done for every chunk of posts, either in the main process or
+    in a worker process.
 
-def combine_false_friends(word_dict):
+    :param texts: List of texts
+    :param expected_language: expected language if detected language is not supported
+    :return: Dictionary of word counters per language and a counter of numbers
     """
-    Removes so-called False Friends from the dictionary of words.
-    A False Friend is a word that appears in several languages, e.g. 'fast' in German and in English. The function 
-    compares the exceptionalism of both appearances and adds the occurrences of the one with the lower exceptionalism 
-    to the other one. This is done to ensure that the word appears on the top most position in the final password list 
-    as necessary.
-    
-    :param word_dict: dictionary of words
-    :return: 
-    """
-    with click.progressbar(word_dict.items(), label='Combining False Friends', show_eta=False) as bar:
-        for language1, words1 in bar:
-            for language2, words2 in word_dict.items():
-                if language1 == language2:
-                    continue
-                else:
-                    for intersection in set(words1).intersection(set(words2)):
-                        if words1[intersection]['exceptionalism'] > words2[intersection]['exceptionalism']:
-                            words1[intersection]['occurrences'] += words2[intersection]['occurrences']
-                            del words2[intersection]
-                        else:
-                            words2[intersection]['occurrences'] += words1[intersection]['occurrences']
-                            del words1[intersection]
+    word_counts = defaultdict(Counter)
+    number_counts = Counter()
+
+    language_codes = detect_languages(texts, expected_language)
+    cleaned_texts = [clean_text(text) for text in texts]
+
+    german_indices = [i for i, language_code in enumerate(language_codes) if language_code == 'de']
+    lemmatized_texts = lemmatize_texts([cleaned_texts[i] for i in german_indices])
+    for i, filtered_words in zip(german_indices, lemmatized_texts):
+        cleaned_texts[i] = " ".join(filtered_words)
+
+    for cleaned_text, language_code in zip(cleaned_texts, language_codes):
+        filtered_strings = remove_stopwords(cleaned_text, language_code, expected_language)
+        filtered_words, filtered_numbers = separate_words_and_numbers(filtered_strings)
 
+        number_counts.update(filtered_numbers)
+        word_counts[language_code].update(filtered_words)
 
-def create_final_word_list(word_dict):
+    return dict(word_counts), number_counts
+
+
+def count_expressions_in_worker(texts, expected_language):
     """
-    Creates a list of Word objects from the dictionary of words and sorts it descending by score.
-    
-    :param word_dict: dictionary of words
-    :return: A list of Word objects containing all information of the word_dict, sorted by score descending
+    Runs count_expressions in a worker process and returns the lemmata the worker found for the chunk as well, so the
+    main process can merge them into its own lemma cache.
+
+    :param texts: List of texts
+    :param expected_language: expected language if detected language is not supported
+    :return: Dictionary of word counters per language, a counter of numbers and a list of new lemmata
+    """
+    return count_expressions(texts, expected_language) + (lemmatizer.pop_new_lemmata(),)
+
+
+def warm_lemma_cache(lemma_cache_file):
+    """
+    Pre-warms the lemma cache of this process with the lemmata saved in a file, e.g. by a previous case.
+
+    :param lemma_cache_file: Path to the pickled lemma cache, nothing happens if it is None or does not exist
+    """
+    if lemma_cache_file and os.path.isfile(lemma_cache_file):
+        lemmatizer.load_from_pickle(lemma_cache_file)
+        log.debug("Loaded {} lemmata from {}".format(len(lemmatizer.lemmata), lemma_cache_file))
+
+
+def init_worker(lemma_cache_file):
+    """
+    Initializer of the worker processes: pre-warms the lemma cache and records the lemmata found by the worker.
+
+    :param lemma_cache_file: Path to the pickled lemma cache or None
+    """
+    warm_lemma_cache(lemma_cache_file)
+    lemmatizer.record_new_lemmata()
+
+
+def count_expressions_in_pool(text_chunks, expected_language, workers, lemma_cache_file=None):
+    """
+    Runs count_expressions for chunks of texts in a pool of worker processes.
+
+    Every worker process loads the language model, the tagger and the lemmatizer once when it imports this module
+    (or inherits them from the parent process) and pre-warms its lemma cache from lemma_cache_file. At most two
+    chunks per worker are in flight at the same time and the results are yielded in the order of the chunks, so
+    merging them gives the same result as a serial run. The lemmata found by the workers are merged into the lemma
+    cache of this process, so it can be saved afterwards.
+
+    :param text_chunks: Iterable of lists of texts
+    :param expected_language: expected language if detected language is not supported
+    :param workers: Number of worker processes
+    :param lemma_cache_file: Optional path to a pickled lemma cache
+    :return: Generator of (chunk size, word counters, number counter) tuples
+    """
+    with multiprocessing.Pool(processes=workers, initializer=init_worker, initargs=(lemma_cache_file,)) as pool:
+        pending = deque()
+        for chunk in text_chunks:
+            pending.append((len(chunk), pool.apply_async(count_expressions_in_worker, (chunk, expected_language))))
+            if len(pending) >= 2 * workers:
+                yield merge_worker_result(*pending.popleft())
+        while pending:
+            yield merge_worker_result(*pending.popleft())
+
+
+def merge_worker_result(chunk_size, result):
+    """
+    :param chunk_size: Amount of texts of the chunk
+    :param result: AsyncResult of count_expressions_in_worker
+    :return: (chunk size, word counters, number counter) of the chunk
     """
-    final_word_list = []
-    with click.progressbar(word_dict.items(), label='Creating final word list', show_eta=False) as bar:
-        for language, words in bar:
-            for word, attributes in words.items():
-                final_word_list.append(Word(term=word,
-                                            occurrences=attributes['occurrences'],
-                                            frequency=attributes['frequency'],
-                                            exceptionalism=attributes['exceptionalism'],
-                                            language=language,
-                                            score=attributes['score']))
-    final_word_list.sort(key=lambda x: x.score, reverse=True)
-    return final_word_list
+    word_counts, number_counts, new_lemmata = result.get()
+    lemmatizer.warm(new_lemmata)
+    return chunk_size, word_counts, number_counts
 
 
-def create_final_number_list(number_dict):
+def create_final_number_list(number_dict, top=None):
     """
-    Creates a list of Number objects from the dictionary of words and sorts it descending by occurences.
+    Creates a table of Number objects from the dictionary of words and sorts it descending by occurences.
 
     :param number_dict: dictionary of numbers
-    :return: A list of Number objects containing all information of the number_dict, sorted by occurences descending
+    :param top: Optional amount of numbers, only the top numbers are selected instead of sorting all of them
+    :return: A NumberTable containing all information of the number_dict, sorted by occurences descending
     """
-    final_number_list = []
-    with click.progressbar(number_dict.items(), label='Creating final number list', show_eta=False) as bar:
-        for number, occurrences in bar:
-            final_number_list.append(Number(number, occurrences))
-    final_number_list.sort(key=lambda x: x.occurrences, reverse=True)
-    return final_number_list
+    if top is not None:
+        # same as the first top numbers of the sorted table
+        top_numbers = heapq.nlargest(top, number_dict.items(), key=itemgetter(1))
+        return NumberTable(number=[number for number, _ in top_numbers],
+                           occurrences=[occurrences for _, occurrences in top_numbers])
 
+    return NumberTable(number=list(number_dict), occurrences=list(number_dict.values())).sort('occurrences')
 
-def ddint():
-    return defaultdict(int)
 
+def hash_text(text):
+    """
+    Calculates a content hash of a text, which is used to recognize posts which were already processed.
+
+    :param text: Text
+    :return: 16 byte digest of the text
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def new_counters(expected_language):
+    """
+    Creates empty raw counters of an extraction.
+
+    :param expected_language: expected language used for the extraction
+    :return: Dictionary with counters of the processed posts (by content hash), words per language and numbers
+    """
+    return {'version': COUNTERS_VERSION,
+            'expected_language': expected_language,
+            'posts': Counter(),
+            'words': dict(),
+            'numbers': Counter()}
+
+
+def load_counters(file, expected_language):
+    """
+    Loads the raw counters persisted by a previous extraction.
+
+    The counters can only be reused if they were created with the same expected language, because it determines the
+    language of posts in unsupported languages.
+
+    :param file: Path to the pickled counters
+    :param expected_language: expected language of the current extraction
+    :return: Dictionary of counters (see new_counters) or None if there are no reusable counters
+    """
+    if not os.path.isfile(file):
+        return None
+    with open(file, 'rb') as f:
+        counters = pickle.load(f)
+    if counters.get('version') != COUNTERS_VERSION or counters.get('expected_language') != expected_language:
+        log.info("Counters in {} cannot be reused, all posts will be processed".format(file))
+        return None
+    return counters
+
+
+def save_counters(file, counters):
+    """
+    Persists the raw counters of an extraction, so that a later extraction only has to process new posts.
+
+    :param file: Path to the pickled counters
+    :param counters: Dictionary of counters (see new_counters)
+    """
+    directory = os.path.dirname(file)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with OutputFile(file, binary=True) as f:
+        pickle.dump(counters, f, protocol=pickle.HIGHEST_PROTOCOL)
+    log.debug("Saved counters of {} processed posts to {}".format(sum(counters['posts'].values()), file))
 
-def dd():
-    return defaultdict(ddint)
+
+def filter_unseen_texts(texts, post_counts):
+    """
+    Yields only the texts which were not processed before and records them in post_counts.
+
+    Identical posts are counted, i.e. if a post was processed once before and appears twice now, it is yielded once.
+
+    :param texts: Iterable of texts
+    :param post_counts: Counter of content hashes of the processed posts
+    :return: Generator of unseen texts
+    """
+    known_counts = Counter(post_counts)
+    for text in texts:
+        text_hash = hash_text(text)
+        if known_counts[text_hash] > 0:
+            known_counts[text_hash] -= 1
+        else:
+            post_counts[text_hash] += 1
+            yield text
 
 
 class ExpressionExtractor:
@@ -313,7 +459,7 @@ class ExpressionExtractor:
         """
         Init method of the WordExtractor Class
         
-        :param texts: List of texts from a user
+        :param texts: Iterable of texts from a user, e.g. a list or a generator which reads posts lazily
         :param case_id: String representation of the case number
         """
         if final_expressions is None:
@@ -332,106 +478,135 @@ class ExpressionExtractor:
             self.expected_language = 'de'
 
         self.final_expressions = final_expressions
+        # state of the last extraction which is needed to write the ranked tail beyond the top expressions
+        self.scorer = None
+        self.number_counts = None
+        self.top = None
 
-    def extract_words_and_numbers(self, weight):
+    def extract_words_and_numbers(self, weight, workers=1, counters_file=None, lemma_cache_file=None, top=None,
+                                  frequency_cache_file=None):
         """
         Starts the extraction process.
         
-        Initializes a dictionary of words (extracted_words)
-            example for extracted_words = {
-                    'en': {
-                        'Dog': {
-                            'occurrences': 3,
-                            'commonness: 3.5,
-                            'score': 0
-                        },
-                        'fast': {
-                            'occurrences': 2,
-                            'commonness: 7.5,
-                            'score': 0
-                        }
-                    },
-                    'de': {
-                        'Hund': {
-                            'occurrences': 6,
-                            'commonness: 3.5,
-                            'score': 0
-                        },
-                        'fast': {
-                            'occurrences': 1,
-                            'commonness: 7.5,
-                            'score': 0
-                        }
-                    }
+        Counts the words per language (word_counts)
+            example for word_counts = {
+                    'en': Counter({'Dog': 3, 'fast': 2}),
+                    'de': Counter({'Hund': 6, 'fast': 1})
             }
         
-        Calls detect_language and remove_stopwords for every text and updates the results in extracted_words.
-        Afterwards it calls calculate_exceptionalism, combine_false_friends, calculate_score and 
-        create_final_word_list for the pre-processed dictionary of words.
-        Sets the final word list (list ob Word objects) as self.final_word_list.
+        Calls count_expressions for chunks of texts and updates the results in word_counts. If more than one worker
+        is given, the chunks are processed in a pool of worker processes.
+        If a counters_file is given, the raw counters of previously processed posts are loaded from it and only posts
+        which were not processed before are filtered. The merged counters are saved to the file afterwards.
+        If a lemma_cache_file is given, the lemma cache is pre-warmed from it and saved to it afterwards, together with
+        the lemmata found by the worker processes.
+        Afterwards an ExpressionScorer calculates the exceptionalism, frequency and score of the counted words in
+        columns, combines the False Friends and creates the Word objects in the order of the score.
+        If top is given, only the top words and numbers are selected (without sorting all of them). The rest can be
+        written with write_tail_to_file.
+        Sets the final words (WordTable) and numbers (NumberTable) as self.final_expressions.
+        :param weight: Weight for the exceptionalism influencing the score
+        :param workers: Number of worker processes used for filtering the posts
+        :param counters_file: Optional path to the persisted raw counters for an incremental extraction
+        :param lemma_cache_file: Optional path to a pickled lemma cache, e.g. shared with previous cases
+        :param top: Optional amount of top words and top numbers which are kept
+        :param frequency_cache_file: Optional path to the sqlite frequency cache (default: in the user cache directory)
         :return:
         """
 
-        extracted_words = defaultdict(dd)
-        extracted_numbers = defaultdict(int)
+        if counters_file:
+            counters = load_counters(counters_file, self.expected_language)
+            if counters is None:
+                counters = new_counters(self.expected_language)
+            else:
+                log.info("Found counters of {} processed posts, only new posts will be processed".format(
+                    sum(counters['posts'].values())))
+            texts = filter_unseen_texts(self.texts, counters['posts'])
+        else:
+            counters = new_counters(self.expected_language)
+            texts = self.texts
+
+        word_counts = counters['words']
+        number_counts = counters['numbers']
 
-        def update_word_dict(words, language):
+        def update_word_dict(chunk_word_counts):
             """
-            Helper function to update the extracted_words dictionary for every text.
+            Helper function to update the word counters for every chunk of texts.
             Increments the occurrences of each word.
             
-            :param words: extracted words per single text
-            :param language: the language of the text
+            :param chunk_word_counts: word counters per language of a chunk of texts
             :return: 
             """
-            for word in words:
-                extracted_words[language][word]['occurrences'] += 1
+            for language, counts in chunk_word_counts.items():
+                word_counts.setdefault(language, Counter()).update(counts)
 
-        def update_number_dict(numbers):
+        def update_number_dict(chunk_number_counts):
             """
-            Helper function to update the extracted_words dictionary for every text.
-            Increments the occurrences of each word.
+            Helper function to update the number counter for every chunk of texts.
+            Increments the occurrences of each number.
 
-            :param numbers: extracted numbers per single text
+            :param chunk_number_counts: number counter of a chunk of texts
             :return: 
             """
-            for number in numbers:
-                extracted_numbers[number] += 1
-
-        log.debug("Filtering posts ...")
-        with click.progressbar(self.texts, label='Filtering {} posts'.format(len(self.texts)), show_eta=True) as bar:
-            for text in bar:
-                language_code = detect_language(text, self.expected_language)
-                cleaned_text = clean_text(text)
+            number_counts.update(chunk_number_counts)
 
-                if language_code == 'de':
-                    filtered_words = lemmatize_words(cleaned_text)
-                    cleaned_text = " ".join(filtered_words)
+        text_chunks = chunks(texts, LANGUAGE_DETECTION_CHUNK_SIZE)
+        warm_lemma_cache(lemma_cache_file)
+        if workers > 1:
+            log.debug("Filtering posts with {} worker processes ...".format(workers))
+            results = count_expressions_in_pool(text_chunks, self.expected_language, workers, lemma_cache_file)
+        else:
+            log.debug("Filtering posts ...")
+            results = ((len(chunk),) + count_expressions(chunk, self.expected_language) for chunk in text_chunks)
 
-                filtered_strings = remove_stopwords(cleaned_text, language_code, self.expected_language)
-                filtered_words, filtered_numbers = separate_words_and_numbers(filtered_strings)
+        try:
+            amount_texts = len(texts)
+            progress = click.progressbar(length=amount_texts, label='Filtering {} posts'.format(amount_texts),
+                                         show_eta=True)
+        except TypeError:
+            # texts are read lazily, the amount is not known in advance
+            amount_texts = None
+            progress = click_spinner.spinner()
+
+        amount_filtered = 0
+        with progress as bar:
+            for chunk_size, chunk_word_counts, chunk_number_counts in results:
+                update_number_dict(chunk_number_counts)
+                update_word_dict(chunk_word_counts)
+                amount_filtered += chunk_size
+                if amount_texts is not None:
+                    bar.update(chunk_size)
+        log.debug("Filtered {} posts".format(amount_filtered))
+        if workers <= 1:
+            log.debug("Lemma cache: {}".format(lemmatizer.info()))
+        else:
+            log.debug("Lemma cache: {} cached lemmata of all workers".format(len(lemmatizer.lemmata)))
 
-                update_number_dict(filtered_numbers)
-                update_word_dict(filtered_words, language_code)
+        if lemma_cache_file:
+            lemmatizer.save_to_pickle(lemma_cache_file)
 
-        # pickle.dump(extracted_words, open('data/filtered_words.pkl', "wb"))
-        # pickle.dump(extracted_numbers, open('data/filtered_numbers.pkl', "wb"))
+        if counters_file:
+            save_counters(counters_file, counters)
 
-        # extracted_words = pickle.load(open('data/filtered_words.pkl', 'rb'))
-        # extracted_numbers = pickle.load(open('data/filtered_numbers.pkl', 'rb'))
+        scorer = ExpressionScorer(word_counts)
+        extracted_numbers = number_counts
 
         log.debug("Calculating exceptionalism of words ...")
-        calculate_exceptionalism(extracted_words, self.expected_language)
+        with FrequencyCache(frequency_cache_file) as frequency_cache:
+            scorer.calculate_exceptionalism(self.expected_language, frequency_cache)
         log.debug("Calculating frequency of words ...")
-        calculate_frequency(extracted_words)
+        scorer.calculate_frequency()
         log.debug("Combining False Friends ...")
-        combine_false_friends(extracted_words)
+        scorer.combine_false_friends()
         log.debug("Calculating score ...")
-        calculate_score(extracted_words, weight)
+        scorer.calculate_score(weight)
 
-        final_word_list = create_final_word_list(extracted_words)
-        final_number_list = create_final_number_list(extracted_numbers)
+        final_word_list = scorer.create_table(scorer.ranking(top))
+        final_number_list = create_final_number_list(extracted_numbers, top)
         self.final_expressions = {'words': final_word_list, 'numbers': final_number_list}
+        self.scorer = scorer
+        self.number_counts = extracted_numbers
+        self.top = top
         log.info("Finished extraction of words and numbers!")
 
     def print_expressions(self):
@@ -461,17 +636,95 @@ class ExpressionExtractor:
         file = os.path.join(directory, 'expressions_{}.{}'.format(today, ('pkl' if pickled else 'txt')))
 
         log.info("Writing extracted expressions to file")
-        if pickled:
-            with open(file, "wb") as f:
+        with OutputFile(file, binary=pickled) as f:
+            if pickled:
                 pickle.dump(self.final_expressions, f)
-        else:
-            output = ''
-            for word in self.final_expressions['words']:
-                output += str(word) + "\n"
-            for number in self.final_expressions['numbers']:
-                output += str(number) + "\n"
-
-            with open(file=file, mode='w+') as f:
-                f.write(output)
+            else:
+                f.writelines(str(word) + "\n" for word in self.final_expressions['words'])
+                f.writelines(str(number) + "\n" for number in self.final_expressions['numbers'])
+
+        log.info("Successfully written to file {}".format(file))
+
+    def write_to_binary_file(self, directory=''):
+        """
+        Writes extracted words to a binary ExpressionStore file, which can be memory-mapped and read partially.
+
+        :param directory: Optional directory where the file will be located
+        :return: Path to the file
+        """
+        if not directory:
+            directory = 'data/{}'.format(self.case_id)
+
+        today = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        file = os.path.join(directory, 'expressions_{}.{}'.format(today, ExpressionStore.EXTENSION))
+
+        log.info("Writing extracted expressions to binary file")
+        with OutputFile(file, binary=True) as f:
+            ExpressionStore.write_expression_store(f, self.final_expressions, self.case_id, self.expected_language)
+        log.info("Successfully written to file {}".format(file))
+        return file
+
+    @staticmethod
+    def read_from_file(file, top=None):
+        """
+        Reads the final expressions from a file written by write_to_file (pickle) or write_to_binary_file.
+
+        :param file: Path to the file
+        :param top: Optional amount of top words and numbers, only these are read from a binary file
+        :return: Dictionary with the words and numbers
+        """
+        if file.endswith('.' + ExpressionStore.EXTENSION):
+            with ExpressionStore.ExpressionStore(file) as store:
+                return store.expressions(top)
+
+        with open(file, 'rb') as f:
+            expressions = pickle.load(f)
+        if top is not None:
+            expressions = {'words': expressions['words'][:top], 'numbers': expressions['numbers'][:top]}
+        return expressions
+
+    def write_tail_to_file(self, directory='', pickled=True):
+        """
+        Writes the ranked words and numbers beyond the top expressions of the last extraction to a file.
+
+        The tail is written in chunks of TAIL_CHUNK_SIZE expressions, so it is never held in memory as a whole. A pickled
+        tail is a sequence of pickled dictionaries with a WordTable ('words') and a NumberTable ('numbers') like the
+        final expressions, all words come before the numbers.
+
+        :param directory: Optional directory where the file will be located
+        :param pickled: Whether the file should be a pickle (txt if False)
+        """
+        if self.scorer is None or self.top is None:
+            log.info("No ranked tail to write, all expressions are in the final expressions")
+            return
+
+        if not directory:
+            directory = 'data/{}'.format(self.case_id)
+
+        today = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        file = os.path.join(directory, 'ranked_tail_{}.{}'.format(today, ('pkl' if pickled else 'txt')))
+
+        word_rows = self.scorer.ranking()[self.top:]
+        numbers = sorted(self.number_counts.items(), key=itemgetter(1), reverse=True)[self.top:]
+
+        log.info("Writing {} words and {} numbers of the ranked tail to file".format(len(word_rows), len(numbers)))
+        with OutputFile(file, binary=pickled) as f:
+            for rows in chunks(word_rows, TAIL_CHUNK_SIZE):
+                words = self.scorer.create_table(rows)
+                if pickled:
+                    pickle.dump({'words': words, 'numbers': NumberTable()}, f)
+                else:
+                    f.writelines(str(word) + "\n" for word in words)
+            for number_chunk in chunks(numbers, TAIL_CHUNK_SIZE):
+                number_table = NumberTable(number=[number for number, _ in number_chunk],
+                                           occurrences=[occurrences for _, occurrences in number_chunk])
+                if pickled:
+                    pickle.dump({'words': WordTable(), 'numbers': number_table}, f)
+                else:
+                    f.writelines(str(number) + "\n" for number in number_table)
 
         log.info("Successfully written to file {}".format(file))
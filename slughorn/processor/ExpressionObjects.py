@@ -1,4 +1,11 @@
+import numpy as np
+
+# amount of rows which are converted to Python values at once when iterating over an ExpressionTable
+ITERATION_CHUNK_SIZE = 10000
+
+
 class Word:
+    __slots__ = ('term', 'occurrences', 'frequency', 'exceptionalism', 'language', 'score')
 
     def __init__(self, term, occurrences=0, frequency=0.0, exceptionalism=0, language=None, score=0):
         self.term = term
@@ -8,15 +15,141 @@ class Word:
         self.language = language
         self.score = score
 
+    def __getstate__(self):
+        # the same state as the former Word objects with a __dict__, so pickles stay compatible in both directions
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # default state of slotted objects: (__dict__, slots)
+            state = state[1]
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+
     def __repr__(self):
         return "Word({0}, occ: {1}, freq: {2:.5f}, exc: {3:.5f}, sco: {4:.5f})".format(self.term, self.occurrences, self.frequency, self.exceptionalism, self.score)
 
 
 class Number:
+    __slots__ = ('number', 'occurrences')
 
     def __init__(self, number, occurrences=0):
         self.number = number
         self.occurrences = occurrences
 
+    __getstate__ = Word.__getstate__
+    __setstate__ = Word.__setstate__
+
     def __repr__(self):
         return "Number({0}, occ: {1})".format(self.number, self.occurrences)
+
+
+class ExpressionTable:
+    """
+    An ExpressionTable holds many expressions in parallel NumPy arrays (one per attribute) instead of one object per
+    expression.
+
+    It behaves like a read-only list of expression objects: iterating and indexing create the objects on the fly,
+    slicing and sorting return new tables without creating any objects.
+    Subclasses define the expression class and the type of every column.
+    """
+
+    expression_class = None
+    # (attribute, NumPy dtype) in the order of the arguments of expression_class
+    columns = ()
+
+    def __init__(self, **columns):
+        """
+        Init method of the ExpressionTable Class
+
+        :param columns: One sequence of values per attribute of the expressions, all of the same length
+        """
+        self.data = dict()
+        for attribute, dtype in self.columns:
+            values = columns.get(attribute, ())
+            if dtype is object:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            else:
+                array = np.asarray(values, dtype=dtype)
+            self.data[attribute] = array
+
+    @classmethod
+    def from_expressions(cls, expressions):
+        """
+        Creates a table from expression objects, e.g. a list of Word objects of an older pickle.
+
+        :param expressions: Iterable of expression objects
+        :return: Table of the expressions in the same order
+        """
+        expressions = list(expressions)
+        return cls(**{attribute: [getattr(expression, attribute) for expression in expressions]
+                      for attribute, _ in cls.columns})
+
+    def column(self, attribute):
+        """
+        :param attribute: Name of the attribute
+        :return: NumPy array of the attribute of all expressions
+        """
+        return self.data[attribute]
+
+    def __len__(self):
+        return len(self.data[self.columns[0][0]])
+
+    def __iter__(self):
+        for start in range(0, len(self), ITERATION_CHUNK_SIZE):
+            values = [self.data[attribute][start:start + ITERATION_CHUNK_SIZE].tolist()
+                      for attribute, _ in self.columns]
+            for row in zip(*values):
+                yield self.expression_class(*row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        return self.expression_class(*(self.data[attribute][index].item() if dtype is not object
+                                       else self.data[attribute][index]
+                                       for attribute, dtype in self.columns))
+
+    def take(self, rows):
+        """
+        :param rows: Array of rows
+        :return: Table of the given rows
+        """
+        table = self.__class__.__new__(self.__class__)
+        table.data = {attribute: array[rows] for attribute, array in self.data.items()}
+        return table
+
+    def sort(self, attribute, reverse=True):
+        """
+        Sorts the table by a numeric attribute. Expressions with the same value keep their order like in sorted().
+
+        :param attribute: Name of the attribute, e.g. 'score' or 'occurrences'
+        :param reverse: Sort descending
+        :return: Sorted table
+        """
+        values = self.data[attribute]
+        return self.take(np.argsort(-values if reverse else values, kind='stable'))
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, list(self))
+
+
+class WordTable(ExpressionTable):
+    """
+    Table of Word objects
+    """
+
+    expression_class = Word
+    columns = (('term', object), ('occurrences', np.int64), ('frequency', np.float64),
+               ('exceptionalism', np.float64), ('language', object), ('score', np.float64))
+
+
+class NumberTable(ExpressionTable):
+    """
+    Table of Number objects
+    """
+
+    expression_class = Number
+    columns = (('number', object), ('occurrences', np.int64))
@@ -0,0 +1,183 @@
+import logging
+
+import numpy as np
+
+from slughorn.processor.ExpressionObjects import WordTable
+
+log = logging.getLogger('slughorn')
+
+
+class ExpressionScorer:
+    """
+    An ExpressionScorer object calculates the exceptionalism, frequency and score of all words of a case.
+
+    The words are held in columns instead of nested dictionaries: one row per (language, word) pair with the term, the
+    id of its language and its occurrences. The rows of a language are contiguous and in the order of the counters. All
+    calculations are vectorized, the emitted rows are returned as a WordTable without creating Word objects.
+    """
+
+    def __init__(self, word_counts):
+        """
+        Init method of the ExpressionScorer Class
+
+        :param word_counts: Dictionary of word counters per language
+        """
+        self.languages = list(word_counts)
+        self.terms = []
+        language_sizes = []
+        for counts in word_counts.values():
+            self.terms.extend(counts)
+            language_sizes.append(len(counts))
+
+        amount_rows = len(self.terms)
+        self.language_ids = np.repeat(np.arange(len(self.languages)), language_sizes)
+        self.language_offsets = np.concatenate(([0], np.cumsum(language_sizes))).astype(np.int64)
+        self.occurrences = np.fromiter((occurrences for counts in word_counts.values()
+                                        for occurrences in counts.values()), dtype=np.int64, count=amount_rows)
+        self.exceptionalism = np.zeros(amount_rows)
+        self.frequency = np.zeros(amount_rows)
+        self.score = np.zeros(amount_rows)
+        # rows which were not absorbed by a false friend
+        self.active = np.ones(amount_rows, dtype=bool)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def language_rows(self, language_id):
+        """
+        :param language_id: Index of the language in self.languages
+        :return: slice of the rows of the language
+        """
+        return slice(self.language_offsets[language_id], self.language_offsets[language_id + 1])
+
+    def calculate_exceptionalism(self, expected_language, frequency_cache):
+        """
+        Detects how common the words are in their language using 'wordfreq'
+        word_frequency returns the share the word has in the language, with 1 if there is only one word in the corpus
+        and 0 being an unknown word.
+        The frequencies of all words of a language are looked up at once in the frequency cache.
+        The value is Min-Max scaled by dividing it by the value of the word with the highest commonness.
+        To get the exceptionalism of a word the value is substracted from 1. If no word is known at all, every word
+        gets an exceptionalism of 1.
+
+        :param expected_language: expected language if detected language is not in wordfreq
+        :param frequency_cache: FrequencyCache for the lookups
+        :return:
+        """
+        for language_id, language in enumerate(self.languages):
+            rows = self.language_rows(language_id)
+            words = self.terms[rows]
+            try:
+                frequencies = frequency_cache.get_frequencies(words, language)
+            except LookupError:
+                log.debug("Language code {} not found in wordfreq. Using {} instead.".format(language, expected_language))
+                frequencies = frequency_cache.get_frequencies(words, expected_language)
+            self.exceptionalism[rows] = frequencies
+
+        # perform Min-Max Scaling (dividing by the maximum value appearing)
+        highest_frequency = self.exceptionalism.max() if len(self) else 0.0
+        if highest_frequency > 0:
+            self.exceptionalism = 1 - (self.exceptionalism / highest_frequency)
+        else:
+            self.exceptionalism[:] = 1.0
+
+    def calculate_frequency(self):
+        """
+        Calculates how often the words is used in all postings of the target person.
+        The amount of occurrences of every word is divided by the amount of all words together. This results in the
+        share of this word.
+        The value is Min-Max scaled by dividing it by the value of the word with the highest share.
+
+        :return:
+        """
+        if not len(self):
+            return
+        self.frequency = self.occurrences / self.occurrences.sum()
+        # perform Min-Max Scaling (dividing by the maximum value appearing)
+        self.frequency /= self.frequency.max()
+
+    def combine_false_friends(self):
+        """
+        Removes so-called False Friends from the words.
+        A False Friend is a word that appears in several languages, e.g. 'fast' in German and in English. The
+        appearances are compared in the order of the languages, the current winner absorbs the next appearance if its
+        exceptionalism is higher, otherwise the next appearance absorbs the winner. So the last appearance with the
+        highest exceptionalism wins and gets the occurrences of all appearances.
+
+        :return:
+        """
+        if not len(self):
+            return
+        term_ids = dict()
+        term_rows = np.fromiter((term_ids.setdefault(term, len(term_ids)) for term in self.terms), dtype=np.int64,
+                                count=len(self))
+        if len(term_ids) == len(self):
+            return
+
+        # group the rows by term, the rows of a group stay in the order of the languages
+        order = np.argsort(term_rows, kind='stable')
+        group_ids = term_rows[order]
+        group_sizes = np.bincount(group_ids)
+        # only the groups of terms which appear in several languages
+        rows = order[group_sizes[group_ids] > 1]
+        group_sizes = group_sizes[group_sizes > 1]
+        group_starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+
+        exceptionalism = self.exceptionalism[rows]
+        highest = np.repeat(np.maximum.reduceat(exceptionalism, group_starts), group_sizes)
+        winners = np.maximum.reduceat(np.where(exceptionalism == highest, rows, -1), group_starts)
+        total_occurrences = np.add.reduceat(self.occurrences[rows], group_starts)
+
+        self.active[rows] = False
+        self.active[winners] = True
+        self.occurrences[winners] = total_occurrences
+
+    def calculate_score(self, exceptionalism_weight):
+        """
+        Calculates the score of each word.
+        The score of a word is the weighted sum of its exceptionalism and its frequency. A higher value means that
+        the word is a better candidate for a password.
+
+        :param exceptionalism_weight: Weight for the exceptionalism influencing the score
+        :return:
+        """
+        frequency_weight = 1.0 - exceptionalism_weight
+        self.score = exceptionalism_weight * self.exceptionalism + frequency_weight * self.frequency
+
+    def ranking(self, top=None):
+        """
+        Ranks the remaining rows by score.
+
+        If top is given, the top rows are selected with a partition instead of sorting all rows. Rows with the score
+        of the last selected row are taken in row order, so the result is the same as the beginning of the full
+        ranking.
+
+        :param top: Optional amount of rows
+        :return: Array of the remaining rows sorted by score descending, rows with the same score keep their order
+        """
+        rows = np.flatnonzero(self.active)
+        scores = self.score[rows]
+        if top is not None and top < len(rows):
+            threshold = -np.partition(-scores, top - 1)[top - 1]
+            selected = scores > threshold
+            ties = np.flatnonzero(scores == threshold)
+            selected[ties[:top - np.count_nonzero(selected)]] = True
+            rows, scores = rows[selected], scores[selected]
+        return rows[np.argsort(-scores, kind='stable')]
+
+    def create_table(self, rows):
+        """
+        Creates a WordTable of the given rows, no Word objects are created.
+
+        :param rows: Array of rows, e.g. (a part of) the ranking
+        :return: WordTable in the order of the rows
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        languages = np.empty(len(self.languages), dtype=object)
+        languages[:] = self.languages
+        return WordTable(term=[self.terms[row] for row in rows.tolist()],
+                         occurrences=self.occurrences[rows],
+                         frequency=self.frequency[rows],
+                         exceptionalism=self.exceptionalism[rows],
+                         language=languages[self.language_ids[rows]],
+                         score=self.score[rows])
@@ -0,0 +1,200 @@
+"""
+Versioned binary store for the final expressions of a case.
+
+The words and numbers are stored in the order of their ranking in fixed-width columns and string pools, so a store can
+be memory-mapped and the top words read without deserialising the whole file.
+
+File layout (little-endian):
+
+- header: magic b'SLEX', format version (uint16), reserved (uint16), amount of words (uint64), amount of numbers
+  (uint64), size of the meta data (uint32)
+- meta data: UTF-8 encoded JSON with the languages, the case, the expected language and the offsets of the sections
+  relative to the start of the data
+- data (starts at the next multiple of 8), every section 8-byte aligned:
+  - word_offsets: uint64 [words + 1], offsets of the terms in the word pool
+  - occurrences, frequency, exceptionalism, score: int64 / float64 [words]
+  - language: uint16 [words], index into the languages of the meta data
+  - number_offsets: uint64 [numbers + 1], offsets of the numbers in the number pool
+  - number_occurrences: int64 [numbers]
+  - word_pool, number_pool: the UTF-8 encoded terms and numbers
+"""
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from slughorn.processor.ExpressionObjects import WordTable, NumberTable
+
+MAGIC = b'SLEX'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHQQI')
+
+EXTENSION = 'store'
+
+# (name, dtype, amount of values: 'words' or 'numbers', plus 1 for offsets)
+SECTIONS = (('word_offsets', '<u8', 'words', 1),
+            ('occurrences', '<i8', 'words', 0),
+            ('frequency', '<f8', 'words', 0),
+            ('exceptionalism', '<f8', 'words', 0),
+            ('score', '<f8', 'words', 0),
+            ('language', '<u2', 'words', 0),
+            ('number_offsets', '<u8', 'numbers', 1),
+            ('number_occurrences', '<i8', 'numbers', 0))
+
+
+def align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def encode_pool(strings):
+    """
+    :param strings: Iterable of strings
+    :return: offsets (amount + 1) and the UTF-8 encoded strings concatenated
+    """
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    return offsets, b''.join(encoded)
+
+
+def write_expression_store(file, expressions, case_id=None, expected_language=None):
+    """
+    Writes the final expressions into an ExpressionStore file.
+
+    :param file: Path to the store or a new binary file object
+    :param expressions: Dictionary with the words (WordTable or list of Word objects) and numbers (NumberTable or list
+                        of Number objects) in the order of their ranking
+    :param case_id: Optional case of the expressions
+    :param expected_language: Optional expected language of the case
+    """
+    words = expressions['words']
+    if not isinstance(words, WordTable):
+        words = WordTable.from_expressions(words)
+    numbers = expressions['numbers']
+    if not isinstance(numbers, NumberTable):
+        numbers = NumberTable.from_expressions(numbers)
+
+    languages = sorted(set(words.column('language').tolist()), key=str)
+    language_ids = {language: i for i, language in enumerate(languages)}
+
+    word_offsets, word_pool = encode_pool(words.column('term'))
+    number_offsets, number_pool = encode_pool(numbers.column('number'))
+    columns = {
+        'word_offsets': word_offsets,
+        'occurrences': words.column('occurrences'),
+        'frequency': words.column('frequency'),
+        'exceptionalism': words.column('exceptionalism'),
+        'score': words.column('score'),
+        'language': [language_ids[language] for language in words.column('language').tolist()],
+        'number_offsets': number_offsets,
+        'number_occurrences': numbers.column('occurrences'),
+    }
+
+    sections = dict()
+    offset = 0
+    for name, dtype, _, _ in SECTIONS:
+        columns[name] = np.asarray(columns[name], dtype=dtype)
+        sections[name] = offset
+        offset = align(offset + columns[name].nbytes)
+    sections['word_pool'] = offset
+    sections['number_pool'] = align(offset + len(word_pool))
+
+    meta = json.dumps({'case_id': case_id, 'expected_language': expected_language, 'languages': languages,
+                       'sections': sections}).encode('utf-8')
+
+    if not hasattr(file, 'write'):
+        with open(file, 'wb') as f:
+            write_expression_store(f, expressions, case_id, expected_language)
+        return
+
+    # the padding is calculated from the position in the file, so the file object has to be new
+    file.write(HEADER.pack(MAGIC, VERSION, 0, len(words), len(numbers), len(meta)))
+    file.write(meta)
+    data_start = align(HEADER.size + len(meta))
+    for name, _, _, _ in SECTIONS:
+        file.write(b'\0' * (data_start + sections[name] - file.tell()))
+        file.write(columns[name].tobytes())
+    file.write(b'\0' * (data_start + sections['word_pool'] - file.tell()))
+    file.write(word_pool)
+    file.write(b'\0' * (data_start + sections['number_pool'] - file.tell()))
+    file.write(number_pool)
+
+
+class ExpressionStore:
+    """
+    Read-only, memory-mapped ExpressionStore. The columns are NumPy views on the file, terms and numbers are only
+    decoded for the rows which are read.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        with open(file, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, self.amount_words, self.amount_numbers, meta_size = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("'{}' is no expression store".format(file))
+        if version != VERSION:
+            raise ValueError("Unsupported expression store version {} in '{}'".format(version, file))
+
+        meta = json.loads(self.buffer[HEADER.size:HEADER.size + meta_size].decode('utf-8'))
+        self.case_id = meta['case_id']
+        self.expected_language = meta['expected_language']
+        self.languages = np.empty(len(meta['languages']), dtype=object)
+        self.languages[:] = meta['languages']
+
+        data_start = align(HEADER.size + meta_size)
+        self.sections = {name: data_start + offset for name, offset in meta['sections'].items()}
+        self.columns = dict()
+        for name, dtype, amount, extra in SECTIONS:
+            count = (self.amount_words if amount == 'words' else self.amount_numbers) + extra
+            self.columns[name] = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.sections[name])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def decode(self, pool, offsets, amount):
+        start = self.sections[pool]
+        offsets = offsets[:amount + 1].tolist()
+        return [self.buffer[start + begin:start + end].decode('utf-8') for begin, end in zip(offsets, offsets[1:])]
+
+    def words(self, top=None):
+        """
+        :param top: Optional amount of words, e.g. to read only the top words
+        :return: WordTable of the (top) words in the order of their ranking
+        """
+        amount = self.amount_words if top is None else min(top, self.amount_words)
+        # copies of the columns, so the table stays valid after the store is closed
+        return WordTable(term=self.decode('word_pool', self.columns['word_offsets'], amount),
+                         occurrences=self.columns['occurrences'][:amount].copy(),
+                         frequency=self.columns['frequency'][:amount].copy(),
+                         exceptionalism=self.columns['exceptionalism'][:amount].copy(),
+                         language=self.languages[self.columns['language'][:amount]],
+                         score=self.columns['score'][:amount].copy())
+
+    def numbers(self, top=None):
+        """
+        :param top: Optional amount of numbers, e.g. to read only the top numbers
+        :return: NumberTable of the (top) numbers in the order of their ranking
+        """
+        amount = self.amount_numbers if top is None else min(top, self.amount_numbers)
+        return NumberTable(number=self.decode('number_pool', self.columns['number_offsets'], amount),
+                           occurrences=self.columns['number_occurrences'][:amount].copy())
+
+    def expressions(self, top=None):
+        """
+        :param top: Optional amount of words and numbers
+        :return: Dictionary with the words and numbers like the final expressions of an ExpressionExtractor
+        """
+        return {'words': self.words(top), 'numbers': self.numbers(top)}
+
+    def close(self):
+        # the columns are views on the buffer and have to be released before it can be closed
+        self.columns = dict()
+        self.buffer.close()
@@ -0,0 +1,156 @@
+import logging
+import os
+import sqlite3
+import time
+
+import wordfreq
+from wordfreq import word_frequency
+
+from slughorn.processor.util import chunks
+
+log = logging.getLogger('slughorn')
+
+# the cache is shared by all cases, so it lives in the cache directory of the user instead of the installed package
+CACHE_DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                               'slughorn')
+
+DEFAULT_CACHE_FILE = os.path.join(CACHE_DIRECTORY, 'wordfreq.sqlite')
+
+# maximum amount of (language, word) entries, the least recently used entries are evicted
+DEFAULT_MAX_ENTRIES = 2000000
+
+# sqlite allows at most 999 variables per statement
+SQLITE_BATCH_SIZE = 900
+
+
+class FrequencyCache:
+    """
+    A FrequencyCache object memoizes word frequencies of wordfreq in a sqlite database.
+
+    The database is shared by all cases, so the vocabulary of a case only has to be looked up in wordfreq once. The
+    frequencies are keyed by (language, word) and invalidated when the version of wordfreq or the wordlist changes.
+    """
+
+    def __init__(self, file=None, max_entries=DEFAULT_MAX_ENTRIES, wordlist='large'):
+        """
+        Init method of the FrequencyCache Class
+
+        :param file: Path to the sqlite database (default: DEFAULT_CACHE_FILE), ':memory:' for a cache which is not
+                     persisted
+        :param max_entries: Maximum amount of cached frequencies
+        :param wordlist: wordfreq wordlist the frequencies are looked up in
+        """
+        self.max_entries = max_entries
+        self.wordlist = wordlist
+        self.hits = 0
+        self.misses = 0
+
+        file = file or DEFAULT_CACHE_FILE
+        try:
+            directory = os.path.dirname(file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.connection = sqlite3.connect(file)
+            self._create_tables()
+        except (OSError, sqlite3.Error) as e:
+            log.warning("Frequency cache {} could not be opened ({}). Using a temporary cache instead, the frequencies "
+                        "are not kept for the next case. Choose another file with --frequency_cache.".format(file, e))
+            self.connection = sqlite3.connect(':memory:')
+            self._create_tables()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _create_tables(self):
+        """
+        Creates the tables of the cache and clears it if it was created for another wordfreq version or wordlist.
+        """
+        self.connection.execute("CREATE TABLE IF NOT EXISTS frequencies "
+                                "(language TEXT, word TEXT, frequency REAL, last_used INTEGER, "
+                                "PRIMARY KEY (language, word))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS frequencies_last_used ON frequencies (last_used)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        source = "{} {}".format(getattr(wordfreq, '__version__', ''), self.wordlist)
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        if row is None or row[0] != source:
+            self.connection.execute("DELETE FROM frequencies")
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)", (source,))
+        self.connection.commit()
+
+    def get_frequency(self, word, language):
+        """
+        Looks up the frequency of a single word (see get_frequencies).
+
+        :param word: Word
+        :param language: Language code of the word
+        :return: Frequency of the word in the language
+        """
+        return self.get_frequencies([word], language)[0]
+
+    def get_frequencies(self, words, language):
+        """
+        Looks up the frequencies of a whole vocabulary of a language.
+
+        Cached frequencies are read in batches, all missing frequencies are looked up in wordfreq and added to the
+        cache in one transaction.
+
+        :param words: Iterable of words
+        :param language: Language code of the words
+        :raises LookupError: if wordfreq does not support the language
+        :return: List of frequencies in the same order as words
+        """
+        words = list(words)
+        unique_words = list(dict.fromkeys(words))
+        now = int(time.time())
+
+        frequencies = dict()
+        for batch in chunks(unique_words, SQLITE_BATCH_SIZE):
+            placeholders = ','.join('?' * len(batch))
+            rows = self.connection.execute("SELECT word, frequency FROM frequencies "
+                                           "WHERE language = ? AND word IN ({})".format(placeholders),
+                                           [language] + batch)
+            frequencies.update(rows)
+            self.connection.execute("UPDATE frequencies SET last_used = ? "
+                                    "WHERE language = ? AND word IN ({})".format(placeholders),
+                                    [now, language] + batch)
+
+        missing_words = [word for word in unique_words if word not in frequencies]
+        new_rows = []
+        for word in missing_words:
+            frequency = word_frequency(word, language, wordlist=self.wordlist)
+            frequencies[word] = frequency
+            new_rows.append((language, word, frequency, now))
+        self.hits += len(unique_words) - len(missing_words)
+        self.misses += len(missing_words)
+        self.connection.executemany("INSERT OR REPLACE INTO frequencies (language, word, frequency, last_used) "
+                                    "VALUES (?, ?, ?, ?)", new_rows)
+        self.connection.commit()
+
+        return [frequencies[word] for word in words]
+
+    def evict(self):
+        """
+        Removes the least recently used frequencies if the cache holds more than max_entries entries.
+        """
+        amount_entries = self.connection.execute("SELECT COUNT(*) FROM frequencies").fetchone()[0]
+        if amount_entries > self.max_entries:
+            self.connection.execute("DELETE FROM frequencies WHERE rowid IN "
+                                    "(SELECT rowid FROM frequencies ORDER BY last_used LIMIT ?)",
+                                    (amount_entries - self.max_entries,))
+            self.connection.commit()
+            log.debug("Evicted {} entries from the frequency cache".format(amount_entries - self.max_entries))
+
+    def close(self):
+        """
+        Evicts surplus entries, closes the database and logs the hit rate.
+        """
+        self.evict()
+        self.connection.close()
+        lookups = self.hits + self.misses
+        if lookups:
+            log.debug("Frequency cache: {} hits, {} misses ({:.1%} hit rate)".format(self.hits, self.misses,
+                                                                                     self.hits / lookups))
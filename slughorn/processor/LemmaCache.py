@@ -0,0 +1,108 @@
+import logging
+import pickle
+from collections import OrderedDict
+
+log = logging.getLogger('slughorn')
+
+# maximum amount of cached (word, POS tag) pairs
+DEFAULT_MAX_SIZE = 200000
+
+
+class LemmaCache:
+    """
+    A LemmaCache object memoizes the lemmata found by a GermaLemma lemmatizer.
+
+    German posts repeat the same words with the same POS tags constantly, so the lemma of a (word, POS tag) pair is
+    only searched once. The least recently used pairs are evicted if more than maxsize pairs are cached.
+    """
+
+    def __init__(self, lemmatizer, maxsize=DEFAULT_MAX_SIZE):
+        """
+        Init method of the LemmaCache Class
+
+        :param lemmatizer: GermaLemma object
+        :param maxsize: Maximum amount of cached lemmata
+        """
+        self.lemmatizer = lemmatizer
+        self.maxsize = maxsize
+        self.lemmata = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # lemmata found since the last call of pop_new_lemmata, None if they are not recorded
+        self.new_lemmata = None
+
+    def find_lemma(self, w, pos_tag):
+        """
+        Finds the lemma of word `w` with POS tag `pos_tag` like GermaLemma.find_lemma.
+
+        Unsupported POS tags are cached as well and raise a ValueError every time.
+
+        :param w: Word
+        :param pos_tag: STTS POS tag of the word
+        :return: Lemma of the word
+        """
+        key = (w, pos_tag)
+        try:
+            lemma = self.lemmata[key]
+        except KeyError:
+            self.misses += 1
+            try:
+                lemma = self.lemmatizer.find_lemma(w, pos_tag)
+            except ValueError:
+                lemma = None
+            self.lemmata[key] = lemma
+            if self.new_lemmata is not None:
+                self.new_lemmata.append((key, lemma))
+            if len(self.lemmata) > self.maxsize:
+                self.lemmata.popitem(last=False)
+        else:
+            self.hits += 1
+            self.lemmata.move_to_end(key)
+
+        if lemma is None:
+            raise ValueError("Unsupported POS tag")
+        return lemma
+
+    def warm(self, lemmata):
+        """
+        Pre-warms the cache with known lemmata, e.g. the ones of a previous case.
+
+        :param lemmata: Iterable of ((word, POS tag), lemma) pairs, the most recently used last
+        """
+        for key, lemma in lemmata:
+            self.lemmata[key] = lemma
+            self.lemmata.move_to_end(key)
+        while len(self.lemmata) > self.maxsize:
+            self.lemmata.popitem(last=False)
+
+    def record_new_lemmata(self):
+        """
+        Starts recording the lemmata which are found from now on, e.g. in a worker process whose lemmata are merged
+        into the cache of the main process with warm.
+        """
+        self.new_lemmata = []
+
+    def pop_new_lemmata(self):
+        """
+        :return: List of ((word, POS tag), lemma) pairs found since the last call, the most recently found last
+        """
+        new_lemmata = self.new_lemmata or []
+        self.new_lemmata = []
+        return new_lemmata
+
+    def info(self):
+        """
+        :return: String with the hits, misses and size of the cache
+        """
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return "{} hits, {} misses ({:.1%} hit rate), {} cached lemmata".format(self.hits, self.misses, hit_rate,
+                                                                              len(self.lemmata))
+
+    def save_to_pickle(self, pickle_file):
+        with open(pickle_file, 'wb') as f:
+            pickle.dump(list(self.lemmata.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_from_pickle(self, pickle_file):
+        with open(pickle_file, 'rb') as f:
+            self.warm(pickle.load(f))
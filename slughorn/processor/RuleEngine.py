@@ -0,0 +1,360 @@
+"""
+In-process engine which applies hashcat rules to words, e.g. to preview the candidates of a rule set or to measure how
+many new candidates every rule yields.
+
+Every rule is compiled once into a Python function, so applying a rule to a word only costs the string operations of
+the rule and no dispatch per rule function. Appended and prepended characters at the end of a rule are merged into
+one concatenation. A rule function returns None if the word is rejected. Positions beyond the
+end of the word leave the word unchanged like in hashcat.
+"""
+
+import logging
+import multiprocessing
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from slughorn.processor.CandidateFilter import BloomFilter, candidate_digests
+from slughorn.processor.RuleNormalizer import POSITIONS, parse_rule
+
+log = logging.getLogger('slughorn')
+
+# amount of rules per task of the yield measurement, every task applies its rules to all words
+YIELD_RULES_PER_TASK = 8
+
+# amount of body results (all words with one rule body applied) which are kept per process
+BODY_CACHE_SIZE = 8
+
+# upper bound of the expected amount of distinct candidates of the Bloom filter for the marginal yield, about 120 MB
+YIELD_BLOOM_CAPACITY = 100000000
+
+# false positive rate of the Bloom filter for the marginal yield at its capacity
+YIELD_FALSE_POSITIVE_RATE = 0.01
+
+
+def toggle_at(word, position):
+    if position >= len(word):
+        return word
+    return word[:position] + word[position].swapcase() + word[position + 1:]
+
+
+def replace_at(word, position, character):
+    if position >= len(word):
+        return word
+    return word[:position] + character + word[position + 1:]
+
+
+def shift_at(word, position, function):
+    if position >= len(word):
+        return word
+    return word[:position] + chr(function(ord(word[position]))) + word[position + 1:]
+
+
+def swap(word, first, second):
+    if first >= len(word) or second >= len(word):
+        return word
+    characters = list(word)
+    characters[first], characters[second] = characters[second], characters[first]
+    return ''.join(characters)
+
+
+def title(word, separator):
+    return separator.join(part[:1].upper() + part[1:] for part in word.lower().split(separator))
+
+
+def toggle_after(word, amount, separator):
+    # toggles the case of the character after the amount+1-th separator
+    position = -1
+    for _ in range(amount + 1):
+        position = word.find(separator, position + 1)
+        if position < 0:
+            return word
+    return toggle_at(word, position + 1)
+
+
+def operation_code(function, arguments):
+    """
+    :param function: Rule function
+    :param arguments: Arguments of the rule function
+    :return: List of Python statements which apply the function to the variable w (m is the memorized word)
+    """
+    n = POSITIONS.index(arguments[0]) if arguments and arguments[0] in POSITIONS else None
+    x = repr(arguments[-1]) if arguments else None
+    simple = {
+        ':': [],
+        'l': ['w = w.lower()'],
+        'u': ['w = w.upper()'],
+        'c': ['w = w[:1].upper() + w[1:].lower()'],
+        'C': ['w = w[:1].lower() + w[1:].upper()'],
+        't': ['w = w.swapcase()'],
+        'r': ['w = w[::-1]'],
+        'd': ['w = w + w'],
+        'f': ['w = w + w[::-1]'],
+        '{': ['w = w[1:] + w[:1]'],
+        '}': ['w = w[-1:] + w[:-1]'],
+        '[': ['w = w[1:]'],
+        ']': ['w = w[:-1]'],
+        'k': ['w = w[1:2] + w[:1] + w[2:] if len(w) > 1 else w'],
+        'K': ['w = w[:-2] + w[-1:] + w[-2:-1] if len(w) > 1 else w'],
+        'q': ["w = ''.join(c + c for c in w)"],
+        'E': ["w = title(w, ' ')"],
+        'M': ['m = w'],
+        '4': ['w = w + m'],
+        '6': ['w = m + w'],
+        'Q': ['if w == m: return None'],
+    }
+    if function in simple:
+        return simple[function]
+
+    with_argument = {
+        'T': lambda: ['w = toggle_at(w, {})'.format(n)],
+        'p': lambda: ['w = w * {}'.format(n + 1)],
+        'D': lambda: ['w = w[:{0}] + w[{0} + 1:]'.format(n)],
+        "'": lambda: ['w = w[:{}]'.format(n)],
+        'z': lambda: ['w = w[:1] * {} + w'.format(n)],
+        'Z': lambda: ['w = w + w[-1:] * {}'.format(n)],
+        'y': lambda: ['w = w[:{0}] + w if {0} <= len(w) else w'.format(n)],
+        'Y': lambda: ['w = w + w[len(w) - {0}:] if {0} <= len(w) else w'.format(n)],
+        '+': lambda: ['w = shift_at(w, {}, lambda o: o + 1)'.format(n)],
+        '-': lambda: ['w = shift_at(w, {}, lambda o: o - 1 if o else o)'.format(n)],
+        'L': lambda: ['w = shift_at(w, {}, lambda o: (o << 1) & 0xFF)'.format(n)],
+        'R': lambda: ['w = shift_at(w, {}, lambda o: o >> 1)'.format(n)],
+        '.': lambda: ['w = replace_at(w, {0}, w[{0} + 1]) if {0} + 1 < len(w) else w'.format(n)],
+        ',': lambda: ['w = replace_at(w, {0}, w[{0} - 1]) if 0 < {0} < len(w) else w'.format(n)],
+        '<': lambda: ['if len(w) > {}: return None'.format(n)],
+        '>': lambda: ['if len(w) < {}: return None'.format(n)],
+        '_': lambda: ['if len(w) != {}: return None'.format(n)],
+        '$': lambda: ['w = w + {}'.format(x)],
+        '^': lambda: ['w = {} + w'.format(x)],
+        '@': lambda: ["w = w.replace({}, '')".format(x)],
+        'e': lambda: ['w = title(w, {})'.format(x)],
+        '!': lambda: ['if {} in w: return None'.format(x)],
+        '/': lambda: ['if {} not in w: return None'.format(x)],
+        '(': lambda: ['if not w.startswith({}): return None'.format(x)],
+        ')': lambda: ['if not w.endswith({}): return None'.format(x)],
+        'i': lambda: ['w = w[:{0}] + {1} + w[{0}:] if {0} <= len(w) else w'.format(n, x)],
+        'o': lambda: ['w = replace_at(w, {}, {})'.format(n, x)],
+        '3': lambda: ['w = toggle_after(w, {}, {})'.format(n, x)],
+        '=': lambda: ['if w[{0}:{0} + 1] != {1}: return None'.format(n, x)],
+        '%': lambda: ['if w.count({}) < {}: return None'.format(x, n)],
+        's': lambda: ['w = w.replace({}, {})'.format(repr(arguments[0]), x)],
+    }
+    if function in with_argument:
+        return with_argument[function]()
+
+    m = POSITIONS.index(arguments[1]) if len(arguments) > 1 else None
+    ranges = {
+        'x': ['w = w[{0}:{0} + {1}] if {0} + {1} <= len(w) else w'.format(n, m)],
+        'O': ['w = w[:{0}] + w[{0} + {1}:] if {0} + {1} <= len(w) else w'.format(n, m)],
+        '*': ['w = swap(w, {}, {})'.format(n, m)],
+    }
+    if function in ranges:
+        return ranges[function]
+    raise ValueError("Rule function '{}' is not supported".format(function))
+
+
+def split_rule(operations):
+    """
+    Splits a parsed rule into its body and the characters it appends and prepends at the end, e.g. "c $1 $2" into
+    (('c', ''),), '' and '12'. Rules with the same body share the costly part of their work.
+
+    :param operations: Tuple of operations
+    :return: Body (tuple of operations), prefix and suffix
+    """
+    operations = list(operations)
+    prefix = ''
+    suffix = ''
+    while operations and operations[-1][0] in '$^':
+        function, character = operations.pop()
+        if function == '$':
+            suffix = character + suffix
+        else:
+            prefix = prefix + character
+    return tuple(operations), prefix, suffix
+
+
+def compile_operations(operations, prefix='', suffix=''):
+    """
+    :param operations: Tuple of operations
+    :param prefix: Characters which are prepended at the end
+    :param suffix: Characters which are appended at the end
+    :return: Function of a word returning the candidate or None if the word is rejected
+    """
+    lines = ['def apply(w):', '    m = w']
+    for function, arguments in operations:
+        lines.extend('    ' + line for line in operation_code(function, arguments))
+    lines.append('    return {}w{}'.format(repr(prefix) + ' + ' if prefix else '', ' + ' + repr(suffix) if suffix else ''))
+    namespace = {'toggle_at': toggle_at, 'replace_at': replace_at, 'shift_at': shift_at, 'swap': swap,
+                 'title': title, 'toggle_after': toggle_after}
+    exec('\n'.join(lines), namespace)
+    return namespace['apply']
+
+
+def compile_rule(rule):
+    """
+    :param rule: Rule string
+    :return: Function of a word returning the candidate or None if the word is rejected
+    """
+    return compile_operations(*split_rule(parse_rule(rule)))
+
+
+# (body, prefix, suffix) of every rule, the compiled bodies, the words and the cached body results of a worker process,
+# see load_rules
+rule_parts = []
+body_functions = dict()
+yield_words = []
+body_results = OrderedDict()
+
+
+def load_rules(rules, words):
+    """
+    Splits and compiles the rules in a worker process and keeps the words they are applied to.
+
+    :param rules: List of rule strings
+    :param words: List of words
+    """
+    global rule_parts, body_functions, yield_words, body_results
+    rule_parts = [split_rule(parse_rule(rule)) for rule in rules]
+    body_functions = {body: compile_operations(body) for body, _, _ in rule_parts if body}
+    yield_words = words
+    body_results = OrderedDict()
+
+
+def apply_body(body):
+    """
+    :param body: Body of a rule (see split_rule)
+    :return: Set of the results of the body for all words of this process, rejected words are left out
+    """
+    results = body_results.get(body)
+    if results is None:
+        results = set(map(body_functions[body], yield_words)) if body else set(yield_words)
+        results.discard(None)
+        body_results[body] = results
+        if len(body_results) > BODY_CACHE_SIZE:
+            body_results.popitem(last=False)
+    return results
+
+
+def measure_rules(start, stop):
+    """
+    Applies the rules start to stop of this process to all words.
+
+    Prepending and appending characters is injective, so the unique candidates of a rule are the unique results of its
+    body, which are shared by all rules with the same body.
+
+    :param start: Index of the first rule
+    :param stop: Index after the last rule
+    :return: List of (amount of unique candidates, concatenated digests of the unique candidates) per rule
+    """
+    results = []
+    for body, prefix, suffix in rule_parts[start:stop]:
+        candidates = apply_body(body)
+        if prefix or suffix:
+            candidates = [prefix + word + suffix for word in candidates]
+        results.append((len(candidates), candidate_digests(candidates)))
+    return results
+
+
+class RuleEngine:
+    """
+    A RuleEngine object applies a rule set to words and measures the yield of every rule.
+
+    The unique yield of a rule are its distinct candidates from all words. The marginal yield of a rule are its
+    candidates which no earlier rule generated from any word. The rules are applied to all words in batches of rules
+    in a pool of worker processes, every worker compiles the rules once. The digests of the candidates of every rule
+    are merged in the order of the rules into a single Bloom filter, so the marginal yield is only approximate: a false
+    positive of the Bloom filter takes a new candidate for a known one.
+    """
+
+    def __init__(self, rules, workers=1, rules_per_task=YIELD_RULES_PER_TASK):
+        """
+        Init method of the RuleEngine Class
+
+        :param rules: List of rule strings in the order of their priority
+        :param workers: Number of worker processes for the yield measurement
+        :param rules_per_task: Amount of rules per task
+        """
+        self.rules = list(rules)
+        self.functions = [compile_rule(rule) for rule in self.rules]
+        self.workers = workers
+        self.rules_per_task = rules_per_task
+        self.amount_words = 0
+        self.unique_yield = np.zeros(len(self.rules), dtype=np.int64)
+        self.marginal_yield = np.zeros(len(self.rules), dtype=np.int64)
+        self.seen = None
+
+    def apply(self, words):
+        """
+        Applies all rules to every word like hashcat, rejected words are skipped.
+
+        :param words: Iterable of words
+        :return: Generator of candidates
+        """
+        for word in words:
+            for function in self.functions:
+                candidate = function(word)
+                if candidate is not None:
+                    yield candidate
+
+    def measure_yield(self, words):
+        """
+        Measures the unique and the marginal yield of every rule on the words.
+
+        :param words: Iterable of words, e.g. the output of a WordListGenerator, which is held in memory
+        :return: Arrays of the unique and the marginal yield of the rules
+        """
+        words = list(words)
+        self.amount_words = len(words)
+        capacity = min(max(len(self.rules) * len(words), 1), YIELD_BLOOM_CAPACITY)
+        self.seen = BloomFilter(capacity, YIELD_FALSE_POSITIVE_RATE)
+
+        tasks = [(start, min(start + self.rules_per_task, len(self.rules)))
+                 for start in range(0, len(self.rules), self.rules_per_task)]
+        if self.workers > 1:
+            results = self.measure_in_pool(tasks, words)
+        else:
+            load_rules(self.rules, words)
+            results = (measure_rules(start, stop) for start, stop in tasks)
+
+        index = 0
+        for task_results in results:
+            for unique, digests in task_results:
+                self.unique_yield[index] = unique
+                self.marginal_yield[index] = np.count_nonzero(self.seen.add_digests(digests))
+                index += 1
+        log.info("Measured the yield of {} rules on {} words: {} unique candidates, {} of them new".format(
+            len(self.rules), self.amount_words, self.unique_yield.sum(), self.marginal_yield.sum()))
+        return self.unique_yield, self.marginal_yield
+
+    def measure_in_pool(self, tasks, words):
+        # at most two tasks per worker are in flight, like count_expressions_in_pool, the results are yielded in the
+        # order of the rules
+        with multiprocessing.Pool(processes=self.workers, initializer=load_rules,
+                                  initargs=(self.rules, words)) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(measure_rules, task))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+    def reordered_rules(self, keep=0):
+        """
+        :param keep: Amount of leading rules which keep their position, e.g. a base rule set
+        :return: List of the rules sorted by their marginal yield descending, rules with the same yield keep their order
+        """
+        order = keep + np.argsort(-self.marginal_yield[keep:], kind='stable')
+        return self.rules[:keep] + [self.rules[index] for index in order.tolist()]
+
+    def yield_report(self):
+        """
+        :return: Generator of lines: a comment on the approximation of the marginal yield, the header and the rule,
+                 its unique and its marginal yield per rule, tab-separated
+        """
+        yield "# {} words, unique yield is exact, marginal yield is approximate: new candidates are detected with a " \
+              "Bloom filter with a false positive rate of {} for up to {} candidates".format(
+                  self.amount_words, self.seen.false_positive_rate, self.seen.capacity)
+        yield "rule\tunique\tmarginal"
+        for rule, unique, marginal in zip(self.rules, self.unique_yield.tolist(), self.marginal_yield.tolist()):
+            yield "{}\t{}\t{}".format(rule, unique, marginal)
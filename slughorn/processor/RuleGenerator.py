@@ -1,47 +1,177 @@
 import logging
 import os
+from collections import Counter
 from datetime import datetime
+from operator import itemgetter
 
+from slughorn.output import OutputFile
+from slughorn.processor.RuleEngine import RuleEngine
+from slughorn.processor.RuleNormalizer import RuleNormalizer
 from slughorn.processor.util import BEST64_RULES
 
 log = logging.getLogger('slughorn')
 
+# amount of top-scored words the yield of the rules is measured on
+YIELD_WORDS = 100000
+
+# weight of the word function of the generated rules: the case functions and reversing. The extracted words are lower
+# case (see remove_stopwords), so their case patterns cannot be observed and the weights are fixed priors
+WORD_FUNCTION_WEIGHTS = {'l': 0.55, 'c': 0.3, 'u': 0.1, 'C': 0.025, 'r': 0.025}
+
+# share of the numbers which are appended to a word, the rest is prepended
+APPEND_SHARE = 0.8
+
+# occurrences which are assumed for the numbers 0-100 if they were not extracted
+BUILTIN_NUMBER_OCCURRENCES = 1
+
+
+def number_weights(numbers):
+    """
+    Estimates how likely every number is from the occurrences of the extracted numbers. The numbers 0-100 are always
+    included, if they were not extracted with BUILTIN_NUMBER_OCCURRENCES.
+
+    :param numbers: Iterable of Number objects
+    :return: List of (number, probability) in the order of the extracted numbers followed by 0-100
+    """
+    occurrences = Counter()
+    for number in numbers:
+        occurrences[str(number.number)] += number.occurrences
+    for number in range(101):
+        if str(number) not in occurrences:
+            occurrences[str(number)] = BUILTIN_NUMBER_OCCURRENCES
+    total = sum(occurrences.values())
+    return [(number, count / total) for number, count in occurrences.items()]
+
 
 class RuleGenerator:
     """
     A RuleGenerator object represents one attempt to generate a rule set from a list of extracted expressions.
     """
 
-    def __init__(self, expressions, case_id):
+    def __init__(self, expressions, case_id, max_rules=None, mangle=False):
         """
         Init method of the RuleGenerator Class
 
         :param expressions: Dictionary of excpression objects extracted from a user
         :param case_id: String representation of the case number
+        :param max_rules: Optional maximum amount of rules, e.g. to limit the cracking time per hash
+        :param mangle: Whether the rules are used with the mangled candidates of a WordListGenerator (case and
+                       leetspeak variants) instead of the plain words
         """
         self.expressions = expressions
         self.case_id = case_id
+        self.max_rules = max_rules
+        self.mangle = mangle
         self.final_rules = []
+        # amount of leading BEST64 rules, which keep their position
+        self.amount_base_rules = 0
+        self.rule_engine = None
 
     def generate_rules(self):
         """
         Starts the rule generation process.
+        The BEST64 rules come first, followed by a case function and an appended or prepended number for every
+        extracted number and 0-100 in the order of their expected value: the product of the weight of the case
+        function (see WORD_FUNCTION_WEIGHTS), of the probability of the number (see number_weights) and of appending
+        or prepending.
+        Duplicate and equivalent rules (e.g. of an extracted number which is also in 0-100) are removed afterwards, the
+        first rule is kept. At most max_rules rules are kept.
         """
         self.final_rules.extend(BEST64_RULES)
-        numbers = [number_object.number for number_object in self.expressions['numbers']] + list(range(101))
+        generated_rules = []
+        for number, number_weight in number_weights(self.expressions['numbers']):
+            appending_rule = "".join((["${}".format(digit) for digit in number]))
+            prepending_rule = "".join((["^{}".format(digit) for digit in number[::-1]]))
+            for rule_function, function_weight in WORD_FUNCTION_WEIGHTS.items():
+                generated_rules.append((function_weight * number_weight * APPEND_SHARE,
+                                        "{}{}".format(rule_function, appending_rule)))
+                generated_rules.append((function_weight * number_weight * (1 - APPEND_SHARE),
+                                        "{}{}".format(rule_function, prepending_rule)))
+        generated_rules.sort(key=itemgetter(0), reverse=True)
+        self.final_rules.extend(rule for _, rule in generated_rules)
+
+        self.final_rules = RuleNormalizer(self.assume_lowercase()).normalize(self.final_rules)
+
+        best64_rules = set(BEST64_RULES)
+        self.amount_base_rules = 0
+        while self.amount_base_rules < len(self.final_rules) and \
+                self.final_rules[self.amount_base_rules] in best64_rules:
+            self.amount_base_rules += 1
+        self.limit_rules()
+
+    def read_rules(self, file):
+        """
+        Reads the rules of a hashcat rule file instead of generating them, e.g. to measure their yield with
+        reorder_by_yield. Empty lines and comments are skipped, duplicate, equivalent and invalid rules are removed. At
+        most max_rules rules are kept.
+
+        :param file: Path of the rule file
+        """
+        with open(file, encoding='utf-8', errors='replace') as f:
+            rules = [line.rstrip('\r\n') for line in f]
+        rules = [rule for rule in rules if rule.strip() and not rule.startswith('#')]
+        log.info("Read {} rules from {}".format(len(rules), file))
+        # the rules of a file may be used with any word list
+        self.final_rules = RuleNormalizer(assume_lowercase=False).normalize(rules)
+        self.amount_base_rules = 0
+        self.limit_rules()
+
+    def assume_lowercase(self):
+        """
+        Leading lower casing does not change lower case words, e.g. 'l$1' is the same as '$1' for them. The mangled
+        candidates contain capitalized, upper case and leetspeak variants, so this only holds for the plain words.
+
+        :return: Whether all words the rules are used with are lower case
+        """
+        return not self.mangle and all(word.term == word.term.lower() for word in self.expressions['words'])
 
-        for number in numbers:
-            appending_rule = "".join((["${}".format(digit) for digit in str(number)]))
-            prepending_rule = "".join((["^{}".format(digit) for digit in str(number)[::-1]]))
-            for rule_function in ['l', 'u', 'c', 'C', 'r']:
-                self.final_rules.append("{}{}".format(rule_function, appending_rule))
-                self.final_rules.append("{}{}".format(rule_function, prepending_rule))
 
-    def write_to_file(self, directory=''):
+    def limit_rules(self):
+        if self.max_rules is not None and len(self.final_rules) > self.max_rules:
+            log.info("Keeping {} of {} rules".format(self.max_rules, len(self.final_rules)))
+            self.final_rules = self.final_rules[:self.max_rules]
+            self.amount_base_rules = min(self.amount_base_rules, self.max_rules)
+
+    def reorder_by_yield(self, words=None, workers=1):
+        """
+        Measures the yield of every rule with a RuleEngine and reorders the rules by their marginal yield, so the rules
+        which generate the most new candidates come first. The BEST64 rules keep their position.
+
+        :param words: Optional iterable of words, e.g. the word list of a WordListGenerator, the rules will be used
+                      with (default: the YIELD_WORDS top words)
+        :param workers: Number of worker processes
+        """
+        if words is None:
+            words = (word.term for word, _ in zip(self.expressions['words'], range(YIELD_WORDS)))
+        self.rule_engine = RuleEngine(self.final_rules, workers)
+        self.rule_engine.measure_yield(words)
+        self.final_rules = self.rule_engine.reordered_rules(keep=self.amount_base_rules)
+
+    def write_yield_report(self, directory=''):
+        """
+        Writes the unique and the marginal yield of every rule (see reorder_by_yield) to a tab-separated file.
+
+        :param directory: Optional directory where the file will be located
+        """
+        if not directory:
+            directory = 'data/{}'.format(self.case_id)
+
+        today = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        file = os.path.join(directory, 'rule_yield_{}.tsv'.format(today))
+
+        with OutputFile(file) as f:
+            f.writelines(line + "\n" for line in self.rule_engine.yield_report())
+
+        log.info("Successfully written rule yield to file {}".format(file))
+
+    def write_to_file(self, directory='', compression=None):
         """
         Writes generated rules to a file.
 
         :param directory: Optional directory where the file will be located
+        :param compression: Optional compression of the file, 'gzip' or 'zstd'
         """
         if not directory:
             directory = 'data/{}'.format(self.case_id)
@@ -52,11 +182,8 @@ class RuleGenerator:
         file = os.path.join(directory, 'rules_{}.{}'.format(today, 'rules'))
 
         log.info("Writing generated rules to file")
-        output = ''
-        for word in self.final_rules:
-            output += str(word) + "\n"
-
-        with open(file=file, mode='w+') as f:
-            f.write(output)
+        output_file = OutputFile(file, compression=compression)
+        with output_file as f:
+            f.writelines(str(rule) + "\n" for rule in self.final_rules)
 
-        log.info("Successfully written rules to file {}".format(file))
+        log.info("Successfully written rules to file {}".format(output_file.path))
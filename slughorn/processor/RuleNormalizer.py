@@ -0,0 +1,191 @@
+"""
+Parser and normaliser for hashcat rules.
+
+A rule is parsed into a tuple of operations (function, arguments), e.g. "l $1 $2" into (('l', ''), ('$', '1'),
+('$', '2')). The canonical form of a rule removes no-ops and applies equivalences which hold for every word, so rules
+with the same canonical form generate the same candidates and only the first one is needed.
+"""
+
+import logging
+
+log = logging.getLogger('slughorn')
+
+# argument types of the hashcat rule functions: 'N' is a position (0-9, A-Z), 'X' any character
+FUNCTIONS = {
+    ':': '', 'l': '', 'u': '', 'c': '', 'C': '', 't': '', 'r': '', 'd': '', 'f': '', '{': '', '}': '', '[': '',
+    ']': '', 'k': '', 'K': '', 'q': '', 'E': '', 'M': '', '4': '', '6': '', 'Q': '',
+    'T': 'N', 'p': 'N', 'D': 'N', "'": 'N', 'z': 'N', 'Z': 'N', 'y': 'N', 'Y': 'N', '+': 'N', '-': 'N', '.': 'N',
+    ',': 'N', 'L': 'N', 'R': 'N', '<': 'N', '>': 'N', '_': 'N',
+    '$': 'X', '^': 'X', '@': 'X', 'e': 'X', '!': 'X', '/': 'X', '(': 'X', ')': 'X',
+    'x': 'NN', 'O': 'NN', '*': 'NN', 'i': 'NX', 'o': 'NX', '3': 'NX', '=': 'NX', '%': 'NX', 's': 'XX',
+}
+
+POSITIONS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# case functions whose result does not depend on the case of the word
+ABSOLUTE_CASE_FUNCTIONS = {'l': 'u', 'u': 'l', 'c': 'C', 'C': 'c'}
+
+# pairs of consecutive operations which cancel each other out
+INVERSE_OPERATIONS = {(('{', ''), ('}', '')), (('}', ''), ('{', ''))}
+# functions which cancel themselves out if they are applied twice with the same arguments
+INVOLUTIONS = {'r', 'T'}
+
+NOOP = ((':', ''),)
+
+
+def parse_rule(rule):
+    """
+    Parses a hashcat rule. Whitespace between the functions is ignored like in hashcat.
+
+    :param rule: Rule string, e.g. "l$1$2" or "] ] $s"
+    :return: Tuple of operations (function, arguments)
+    """
+    operations = []
+    index = 0
+    while index < len(rule):
+        function = rule[index]
+        index += 1
+        if function in ' \t':
+            continue
+        if function not in FUNCTIONS:
+            raise ValueError("Unknown rule function '{}' in rule '{}'".format(function, rule))
+        argument_types = FUNCTIONS[function]
+        arguments = rule[index:index + len(argument_types)]
+        if len(arguments) < len(argument_types):
+            raise ValueError("Missing argument of rule function '{}' in rule '{}'".format(function, rule))
+        for argument, argument_type in zip(arguments, argument_types):
+            if argument_type == 'N' and argument not in POSITIONS:
+                raise ValueError("Invalid position '{}' in rule '{}'".format(argument, rule))
+        index += len(argument_types)
+        operations.append((function, arguments))
+    return tuple(operations)
+
+
+def format_rule(operations):
+    """
+    :param operations: Tuple of operations
+    :return: Rule string with one space between the functions
+    """
+    return ' '.join(function + arguments for function, arguments in operations)
+
+
+def is_caseless_insertion(operation):
+    # appending or prepending a character without case does not interact with the case functions
+    function, arguments = operation
+    return function in '$^' and arguments.lower() == arguments.upper()
+
+
+def collapse_case_run(run):
+    """
+    :param run: List of consecutive case operations (l, u, c, C, t)
+    :return: Equivalent list of at most one operation
+    """
+    functions = [function for function, _ in run]
+    absolute = [index for index, function in enumerate(functions) if function in ABSOLUTE_CASE_FUNCTIONS]
+    start = absolute[-1] if absolute else 0
+    toggles = functions[start:].count('t')
+    if absolute:
+        function = functions[start]
+        return [(ABSOLUTE_CASE_FUNCTIONS[function] if toggles % 2 else function, '')]
+    return [('t', '')] if toggles % 2 else []
+
+
+def canonicalize(operations, assume_lowercase=False):
+    """
+    Canonicalises a parsed rule:
+
+    - no-ops are removed, an empty rule becomes ':'
+    - case functions are moved in front of appended or prepended characters without case (l, u and t in front of $X
+      and ^X, c and C only in front of $X)
+    - consecutive case functions are collapsed, e.g. "u l" to "l" and "l t" to "u"
+    - operations which cancel each other out are removed, e.g. "r r", "T0 T0" or "{ }"
+    - if all words are lower case, a leading "l" is removed
+
+    :param operations: Tuple of operations
+    :param assume_lowercase: Whether the rule is only applied to lower case words
+    :return: Canonical tuple of operations
+    """
+    operations = [operation for operation in operations if operation[0] != ':']
+    changed = True
+    while changed:
+        changed = False
+
+        for index in range(len(operations) - 1):
+            function = operations[index + 1][0]
+            if is_caseless_insertion(operations[index]) and \
+                    (function in 'lut' or (function in 'cC' and operations[index][0] == '$')):
+                operations[index], operations[index + 1] = operations[index + 1], operations[index]
+                changed = True
+
+        collapsed = []
+        run = []
+        for operation in operations + [None]:
+            if operation is not None and operation[0] in 'lucCt':
+                run.append(operation)
+                continue
+            collapsed.extend(collapse_case_run(run))
+            run = []
+            if operation is None:
+                continue
+            if collapsed and ((collapsed[-1], operation) in INVERSE_OPERATIONS or
+                              (collapsed[-1] == operation and operation[0] in INVOLUTIONS)):
+                collapsed.pop()
+            else:
+                collapsed.append(operation)
+        if assume_lowercase and collapsed and collapsed[0] == ('l', ''):
+            collapsed.pop(0)
+
+        if collapsed != operations:
+            operations = collapsed
+            changed = True
+
+    return tuple(operations) or NOOP
+
+
+class RuleNormalizer:
+    """
+    A RuleNormalizer object removes duplicate and equivalent rules from a list of rules. The first rule of every
+    canonical form is kept, so the order of the rules is preserved.
+    """
+
+    def __init__(self, assume_lowercase=False):
+        """
+        Init method of the RuleNormalizer Class
+
+        :param assume_lowercase: Whether the rules are only applied to lower case words
+        """
+        self.assume_lowercase = assume_lowercase
+        self.amount_rules = 0
+        self.amount_pruned = 0
+        self.amount_invalid = 0
+
+    def canonical_form(self, rule):
+        """
+        :param rule: Rule string
+        :return: Canonical tuple of operations of the rule
+        """
+        return canonicalize(parse_rule(rule), self.assume_lowercase)
+
+    def normalize(self, rules):
+        """
+        :param rules: Iterable of rule strings in the order of their priority
+        :return: List of the first rule of every canonical form, invalid rules are dropped
+        """
+        seen = set()
+        result = []
+        for rule in rules:
+            self.amount_rules += 1
+            try:
+                canonical_form = self.canonical_form(rule)
+            except ValueError as e:
+                log.warning("Dropping invalid rule: {}".format(e))
+                self.amount_invalid += 1
+                continue
+            if canonical_form in seen:
+                self.amount_pruned += 1
+                continue
+            seen.add(canonical_form)
+            result.append(rule)
+        log.info("Pruned {} duplicate or equivalent rules and {} invalid rules of {} rules".format(
+            self.amount_pruned, self.amount_invalid, self.amount_rules))
+        return result
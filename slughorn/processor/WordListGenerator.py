@@ -1,43 +1,222 @@
+import heapq
 import logging
 import os
 import pickle
 from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+
+from slughorn.output import OutputFile, ShardedOutput
+from slughorn.processor.CandidateFilter import Deduplicator
 
 log = logging.getLogger('slughorn')
 
+LEET_TABLE = str.maketrans({'a': '4', 'e': '3', 'i': '1', 'o': '0', 's': '5', 't': '7',
+                            'A': '4', 'E': '3', 'I': '1', 'O': '0', 'S': '5', 'T': '7'})
+
+# (transformation, weight) of the variants of every word, the weight is multiplied with the score of the word, the
+# original word has no transformation. The extracted words are lower case (see remove_stopwords), so there is no lower
+# case variant
+VARIANTS = ((None, 1.0),
+            (str.capitalize, 0.9),
+            (str.upper, 0.6),
+            (lambda term: term.translate(LEET_TABLE), 0.5),
+            (lambda term: term.capitalize().translate(LEET_TABLE), 0.45))
+
+# amount of top-scored words which are concatenated to word pairs
+PAIR_COUNT = 1000
+
+# upper bound of the expected amount of distinct candidates of the Bloom filter, about 180 MB at a false positive rate
+# of 0.001. The filter is sized for the expected amount of candidates of the word list (see expected_candidates)
+BLOOM_CAPACITY = 100000000
+
+# amount of candidates which are written at once
+WRITE_CHUNK_SIZE = 100000
+
+
+def combine(left, right, concatenate):
+    """
+    Lazily combines every element of left with every element of right in the order of their priority.
+
+    The priority of a combination is the product of the priorities. The combinations are explored with a heap frontier:
+    (i, j) is only pushed after (i, j - 1), and (i + 1, 0) after (i, 0), so every combination is visited exactly once
+    after all combinations with a higher priority. The left elements are read one by one and can be a generator.
+
+    :param left: Iterable of (priority, value) sorted by priority descending, all priorities >= 0
+    :param right: Sequence of (priority, value) sorted by priority descending, all priorities >= 0
+    :param concatenate: Function of a left and a right value returning the combined value or None to skip it
+    :return: Generator of (priority, value) sorted by priority descending
+    """
+    if not right:
+        return
+    left = iter(left)
+    right_priorities = [priority for priority, _ in right]
+    right_values = [value for _, value in right]
+    amount_right = len(right)
+    lefts = []
+    frontier = []
+
+    element = next(left, None)
+    if element is not None:
+        lefts.append(element)
+        frontier.append((-element[0] * right_priorities[0], 0, 0))
+    while frontier:
+        priority, i, j = frontier[0]
+        left_priority, left_value = lefts[i]
+        if j + 1 < amount_right:
+            heapq.heapreplace(frontier, (-left_priority * right_priorities[j + 1], i, j + 1))
+        else:
+            heapq.heappop(frontier)
+        if j == 0:
+            element = next(left, None)
+            if element is not None:
+                lefts.append(element)
+                heapq.heappush(frontier, (-element[0] * right_priorities[0], len(lefts) - 1, 0))
+        value = concatenate(left_value, right_values[j])
+        if value is not None:
+            yield -priority, value
+
+
+def variant(term, transformation):
+    """
+    :param term: Word
+    :param transformation: Transformation of VARIANTS
+    :return: The variant of the word or None if it is the same as the original word, e.g. the upper case of a number
+    """
+    if transformation is None:
+        return term
+    candidate = transformation(term)
+    return candidate if candidate != term else None
+
 
 class WordListGenerator:
     """
     A WordListGenerator object represents one attempt to generate a word list from a list of extracted words.
     """
 
-    def __init__(self, expressions, case_id):
+    def __init__(self, expressions, case_id, mangle=False, pair_count=PAIR_COUNT, dedup=None,
+                 false_positive_rate=0.001, bloom_capacity=None):
         """
         Init method of the WordListGenerator Class
 
         :param expressions: Dictionary of expression objects extracted from a user
         :param case_id: String representation of the case number
+        :param mangle: Whether password candidates (variants, words with numbers and word pairs) are generated instead
+                       of the plain words
+        :param pair_count: Amount of top-scored words which are concatenated to word pairs
+        :param dedup: Optional removal of duplicates, 'exact' or 'bloom' (memory-bounded for huge word lists)
+        :param false_positive_rate: Probability that the Bloom filter drops a new candidate
+        :param bloom_capacity: Expected amount of distinct candidates of the Bloom filter, by default the expected
+                               amount of candidates of the word list but at most BLOOM_CAPACITY
         """
         self.expressions = expressions
         self.case_id = case_id
+        self.mangle = mangle
+        self.pair_count = pair_count
+        self.dedup = dedup
+        self.false_positive_rate = false_positive_rate
+        self.bloom_capacity = bloom_capacity
+        self.deduplicator = None
         self.final_word_list = []
 
     def generate_word_list(self):
         """
         Starts the password generation process.
-        
+        If mangle is set, the candidates are only generated while they are written (see generate_candidates).
         """
+        if self.mangle:
+            return
         for word in self.expressions['words']:
             self.final_word_list.append(word.term)
         # for number in self.expressions['numbers']:
         #     self.final_passwords.append(number.number)
 
-    def write_to_file(self, directory='', pickled=False):
+    def generate_candidates(self):
+        """
+        Lazily generates password candidates in the order of their priority:
+
+        - variants of every word (original, capitalized, upper case, leetspeak), the priority is the score
+          of the word multiplied with the weight of the variant
+        - every variant followed by every number, the priority of a number is its occurrences divided by the highest
+          occurrences
+        - pairs of the top-scored words, the priority is the product of the scores
+
+        A candidate can appear several times, e.g. as a variant and as a word pair.
+
+        :return: Generator of candidate strings
+        """
+        words = sorted(((word.score, word.term) for word in self.expressions['words']), key=itemgetter(0),
+                       reverse=True)
+        numbers = sorted(((number.occurrences, number.number) for number in self.expressions['numbers']),
+                         key=itemgetter(0), reverse=True)
+        if numbers:
+            highest_occurrences = numbers[0][0] or 1
+            numbers = [(occurrences / highest_occurrences, number) for occurrences, number in numbers]
+        top_words = words[:self.pair_count]
+        variants = [(weight, transformation) for transformation, weight in VARIANTS]
+
+        def word_variants():
+            return combine(words, variants, variant)
+
+        streams = [word_variants(),
+                   combine(word_variants(), numbers, lambda candidate, number: candidate + number),
+                   combine(top_words, top_words, lambda first, second: first + second if first != second else None)]
+        for _, candidate in heapq.merge(*streams, key=itemgetter(0), reverse=True):
+            yield candidate
+
+    def expected_candidates(self):
+        """
+        :return: Amount of candidates of the word list including duplicates: the words or (if mangle is set) the
+                 variants of every word alone and followed by every number plus the pairs of the top-scored words
+        """
+        amount_words = len(self.expressions['words'])
+        if not self.mangle:
+            return amount_words
+        amount_numbers = len(self.expressions['numbers'])
+        amount_top_words = min(amount_words, self.pair_count)
+        return (len(VARIANTS) * amount_words * (1 + amount_numbers) +
+                amount_top_words * (amount_top_words - 1))
+
+    def word_list(self):
+        """
+        :return: Iterator of the plain words or (if mangle is set) the candidates, without duplicates if dedup is set
+        """
+        words = self.generate_candidates() if self.mangle else iter(self.final_word_list)
+        if self.dedup:
+            capacity = self.bloom_capacity or min(max(self.expected_candidates(), 1), BLOOM_CAPACITY)
+            self.deduplicator = Deduplicator(self.dedup, capacity, self.false_positive_rate)
+            words = self.deduplicator.deduplicate(words)
+        return words
+
+    def write_to_stream(self, stream, limit=None):
+        """
+        Writes the word list to an open text stream, e.g. a file or sys.stdout, one candidate per line.
+        The candidates are written in chunks and never held in memory at once.
+
+        :param stream: Text stream
+        :param limit: Optional maximum amount of candidates
+        :return: Amount of written candidates
+        """
+        words = islice(self.word_list(), limit)
+        amount = 0
+        while True:
+            chunk = list(islice(words, WRITE_CHUNK_SIZE))
+            if not chunk:
+                break
+            stream.write("\n".join(chunk))
+            stream.write("\n")
+            amount += len(chunk)
+        if self.deduplicator is not None:
+            self.deduplicator.report()
+        return amount
+
+    def write_to_file(self, directory='', pickled=False, compression=None):
         """
         Writes generated word list to a file.
 
         :param directory: Optional directory where the file will be located
         :param pickled: Whether the file should be a pickle (txt if False)
+        :param compression: Optional compression of the file, 'gzip' or 'zstd'
         """
         if not directory:
             directory = 'data/{}'.format(self.case_id)
@@ -48,15 +227,44 @@ class WordListGenerator:
         file = os.path.join(directory, 'word_list_{}.{}'.format(today, ('pkl' if pickled else 'txt')))
 
         log.info("Writing generated word_list to file")
-        if pickled:
-            with open(file, "wb") as f:
-                pickle.dump(self.final_word_list, f)
-        else:
-            output = ''
-            for word in self.final_word_list:
-                output += str(word) + "\n"
+        output_file = OutputFile(file, binary=pickled, compression=compression)
+        with output_file as f:
+            if pickled:
+                pickle.dump(list(self.word_list()), f)
+                if self.deduplicator is not None:
+                    self.deduplicator.report()
+            else:
+                amount = self.write_to_stream(f)
+                log.info("Written {} candidates".format(amount))
+
+        log.info("Successfully written to file {}".format(output_file.path))
+
+    def write_shards(self, shards, partition='round_robin', directory='', compression=None):
+        """
+        Writes the word list into shards for distributed cracking, see ShardedOutput.
+        The shards are written into the directory word_list_<date> together with their manifest.json.
+
+        :param shards: Amount of shards
+        :param partition: 'round_robin' (every shard gets high-value candidates early) or 'hash' (disjoint shards)
+        :param directory: Optional directory where the shard directory will be located
+        :param compression: Optional compression of the shards, 'gzip' or 'zstd'
+        :return: Path of the shard directory
+        """
+        if not directory:
+            directory = 'data/{}'.format(self.case_id)
+
+        today = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        shard_directory = os.path.join(directory, 'word_list_{}'.format(today))
 
-            with open(file=file, mode='w+') as f:
-                f.write(output)
+        log.info("Writing generated word_list to {} shards".format(shards))
+        words = self.word_list()
+        with ShardedOutput(shard_directory, shards, partition, compression) as output:
+            chunk = list(islice(words, WRITE_CHUNK_SIZE))
+            while chunk:
+                output.write(chunk)
+                chunk = list(islice(words, WRITE_CHUNK_SIZE))
+        if self.deduplicator is not None:
+            self.deduplicator.report()
 
-        log.info("Successfully written to file {}".format(file))
+        log.info("Successfully written shards to {}".format(shard_directory))
+        return shard_directory
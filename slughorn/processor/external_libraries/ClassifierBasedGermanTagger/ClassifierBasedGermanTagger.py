@@ -24,8 +24,40 @@ Tag German text.
 
 import re
 
+from functools import lru_cache
+
 from nltk.tag.sequential import ClassifierBasedTagger
 
+NUMBER_REGEX = re.compile('[0-9]+([\.,][0-9]*)?|[0-9]*[\.,][0-9]+$')
+PUNCT_REGEX = re.compile('\W+$', re.UNICODE)
+UPCASE_REGEX = re.compile('([A-ZÄÖÜ]+[a-zäöüß]*-?)+$')
+DOWNCASE_REGEX = re.compile('[a-zäöüß]+')
+MIXEDCASE_REGEX = re.compile("\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=100000)
+def word_shape(word):
+    """Classify the shape of a word. The result is cached per distinct word.
+    @param word: The word to classify.
+    """
+    if NUMBER_REGEX.match(word):
+        # Included "," as decimal point
+        return 'number'
+    elif PUNCT_REGEX.match(word):
+        # Included unicode flag
+        return 'punct'
+    elif UPCASE_REGEX.match(word):
+        # Included dash for dashed words and umlauts
+        return 'upcase'
+    elif DOWNCASE_REGEX.match(word):
+        # Included umlauts
+        return 'downcase'
+    elif MIXEDCASE_REGEX.match(word):
+        # Included unicode flag
+        return 'mixedcase'
+    else:
+        return 'other'
+
 
 class ClassifierBasedGermanTagger(ClassifierBasedTagger):
     """A classifier based German part-of-speech tagger. It has an accuracy of
@@ -57,30 +89,15 @@ class ClassifierBasedGermanTagger(ClassifierBasedTagger):
             prevtag = history[index-1]
             prevprevtag = history[index-2]
 
-        if re.match('[0-9]+([\.,][0-9]*)?|[0-9]*[\.,][0-9]+$', word):
-            # Included "," as decimal point
-            shape = 'number'
-        elif re.compile('\W+$', re.UNICODE).match(word):
-            # Included unicode flag
-            shape = 'punct'
-        elif re.match('([A-ZÄÖÜ]+[a-zäöüß]*-?)+$', word):
-            # Included dash for dashed words and umlauts
-            shape = 'upcase'
-        elif re.match('[a-zäöüß]+', word):
-            # Included umlauts
-            shape = 'downcase'
-        elif re.compile("\w+", re.UNICODE).match(word):
-            # Included unicode flag
-            shape = 'mixedcase'
-        else:
-            shape = 'other'
+        shape = word_shape(word)
+        word_lower = word.lower()
 
         features = {
             'prevtag': prevtag,
             'prevprevtag': prevprevtag,
             'word': word,
-            'word.lower': word.lower(),
-            'suffix3': word.lower()[-3:],
+            'word.lower': word_lower,
+            'suffix3': word_lower[-3:],
             #'suffix2': word.lower()[-2:],
             #'suffix1': word.lower()[-1:],
             'preffix1': word[:1], # included
@@ -91,4 +108,45 @@ class ClassifierBasedGermanTagger(ClassifierBasedTagger):
             'prevword+word': '%s+%s' % (prevword, word),
             'shape': shape
             }
-        return features
\ No newline at end of file
+        return features
+
+    def tag_sents(self, sentences):
+        """Tag a batch of sentences at once. The tags are the same as the
+        ones of tag() for every sentence.
+        The sentences are tagged position by position. The features only
+        depend on the two previous words and tags, so every distinct context
+        of a position is classified once with a single classify_many call.
+        @param sentences: List of lists of tokens.
+        """
+        sentences = [list(sentence) for sentence in sentences]
+        if self._cutoff_prob is not None or self.backoff is not None:
+            # the cutoff and the backoff taggers work token by token
+            return super(ClassifierBasedGermanTagger, self).tag_sents(sentences)
+
+        histories = [[] for _ in sentences]
+        # longest sentences first, so the sentences which still have a token at an index are a prefix of the order
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]), reverse=True)
+        active = len(order)
+        tags = {}
+        index = 0
+        while True:
+            while active and len(sentences[order[active - 1]]) <= index:
+                active -= 1
+            if not active:
+                break
+
+            contexts = []
+            new_contexts = {}
+            for i in order[:active]:
+                tokens, history = sentences[i], histories[i]
+                context = (tuple(tokens[max(index - 2, 0):index + 1]), tuple(history[max(index - 2, 0):index]))
+                contexts.append(context)
+                if context not in tags and context not in new_contexts:
+                    new_contexts[context] = self.feature_detector(tokens, index, history)
+            tags.update(zip(new_contexts, self._classifier.classify_many(list(new_contexts.values()))))
+
+            for i, context in zip(order[:active], contexts):
+                histories[i].append(tags[context])
+            index += 1
+
+        return [list(zip(sentence, history)) for sentence, history in zip(sentences, histories)]
@@ -23,6 +23,16 @@ GermaLemma like this:
 from germalemma import GermaLemma
 lemmatizer = GermaLemma()
 ```
+
+Alternatively, the corpus or an existing pickle file can be converted into a memory-mapped lemmata store, which is
+opened without loading the lemmata into Python dictionaries and can be shared by several processes:
+
+python germalemma.py tiger_release_[...].conll09 data/lemmata.store
+python germalemma.py data/lemmata.pickle data/lemmata.store
+
+```
+lemmatizer = GermaLemma(store='data/lemmata.store')
+```
 """
 
 import codecs
@@ -32,7 +42,13 @@ from importlib import import_module
 
 from pyphen import Pyphen
 
+try:
+    from .lemmastore import LemmaStore, write_lemma_store
+except (ImportError, ValueError):  # run as a script
+    from lemmastore import LemmaStore, write_lemma_store
+
 DEFAULT_LEMMATA_PICKLE = 'data/lemmata.pickle'
+DEFAULT_LEMMATA_STORE = 'data/lemmata.store'
 
 # valid part-of-speech prefixes
 VALID_POS_PREFIXES = ('N', 'V', 'ADJ', 'ADV')
@@ -76,6 +92,23 @@ for suffix in ADJ_SUFFIXES_BASE:
         ADJ_SUFFIXES_DICT[suffix + flex] = suffix
 
 
+def build_suffix_trie(suffixes):
+    """
+    Build a trie of the reversed suffixes in `suffixes` (full suffix -> reduced suffix). Terminal nodes store the
+    reduced suffix under the key None.
+    """
+    trie = {}
+    for full, reduced in suffixes.items():
+        node = trie
+        for char in reversed(full):
+            node = node.setdefault(char, {})
+        node[None] = reduced
+    return trie
+
+
+ADJ_SUFFIXES_TRIE = build_suffix_trie(ADJ_SUFFIXES_DICT)
+
+
 class GermaLemma(object):
     """
     Lemmatizer for German language text main class.
@@ -86,7 +119,7 @@ class GermaLemma(object):
         """
         Initialize GermaLemma lemmatizer. By default, it will load the lemmatizer data from 'data/lemmata.pickle'. You
         can also pass a manual lemmata dictionary via `lemmata` or load a corpus in CONLL09 format via `tiger_corpus`
-        or load pickled lemmatizer data from `pickle`.
+        or load pickled lemmatizer data from `pickle` or open a memory-mapped lemmata store via `store`.
         Force usage of pattern.de module by setting `use_pattern_module` to True (or False for not using). By default,
         it will try to use pattern.de if it is installed.
         """
@@ -101,6 +134,8 @@ class GermaLemma(object):
             self.lemmata, self.lemmata_lower = self.load_corpus_lemmata(kwargs['tiger_corpus'])
         elif 'pickle' in kwargs:
             self.load_from_pickle(kwargs['pickle'])
+        elif 'store' in kwargs:
+            self.load_from_store(kwargs['store'])
         else:
             self.load_from_pickle(DEFAULT_LEMMATA_PICKLE)
 
@@ -177,10 +212,21 @@ class GermaLemma(object):
         """
         Try to lemmatize adjectives using prevalent German language adjective suffixes. Return possibly lemmatized
         adjective.
+        The longest matching suffix is found in one pass over the end of the word by walking the reversed suffix trie.
         """
-        for full, reduced in ADJ_SUFFIXES_DICT.items():
-            if w.endswith(full):
-                return w[:-len(full)] + reduced
+        node = ADJ_SUFFIXES_TRIE
+        match_length = 0
+        reduced = None
+        for i in range(len(w) - 1, -1, -1):
+            node = node.get(w[i])
+            if node is None:
+                break
+            if None in node:
+                match_length = len(w) - i
+                reduced = node[None]
+
+        if reduced is not None:
+            return w[:-match_length] + reduced
 
         return w
 
@@ -281,23 +327,39 @@ class GermaLemma(object):
         with open(pickle_file, 'rb') as f:
             self.lemmata, self.lemmata_lower = pickle.load(f)
 
+    def save_to_store(self, store_file):
+        write_lemma_store(store_file, self.lemmata, self.lemmata_lower)
+
+    def load_from_store(self, store_file):
+        store = LemmaStore(store_file)
+        self.lemmata, self.lemmata_lower = store.lemmata, store.lemmata_lower
+
 
 if __name__ == '__main__':
     # script entry point to convert a CONLL09 TIGER corpus file into a Python pickle file (which only contains the
-    # lemmata and is much faster to load)
+    # lemmata and is much faster to load) or to convert a corpus or pickle file into a memory-mapped lemmata store
+    # (if the output file ends with '.store')
 
     import sys
     if len(sys.argv) < 2:
-        print('run as: %s <path to TIGER corpus conll09 file>' % sys.argv[0])
+        print('run as: %s <path to TIGER corpus conll09 file or lemmata pickle> [output file]' % sys.argv[0])
         exit(1)
 
-    corpus_file = sys.argv[1]
-    print("loading corpus file '%s'..." % corpus_file)
-    lemmatizer = GermaLemma(tiger_corpus=corpus_file, use_pattern_module=False)
-
-    pickle_file = DEFAULT_LEMMATA_PICKLE
-    print("saving as pickle file '%s'" % pickle_file)
-    lemmatizer.save_to_pickle(pickle_file)
+    input_file = sys.argv[1]
+    if input_file.endswith('.pickle') or input_file.endswith('.pkl'):
+        print("loading pickle file '%s'..." % input_file)
+        lemmatizer = GermaLemma(pickle=input_file, use_pattern_module=False)
+    else:
+        print("loading corpus file '%s'..." % input_file)
+        lemmatizer = GermaLemma(tiger_corpus=input_file, use_pattern_module=False)
+
+    output_file = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_LEMMATA_PICKLE
+    if output_file.endswith('.store'):
+        print("saving as lemmata store '%s'" % output_file)
+        lemmatizer.save_to_store(output_file)
+    else:
+        print("saving as pickle file '%s'" % output_file)
+        lemmatizer.save_to_pickle(output_file)
 
     print("done.")
     exit(0)
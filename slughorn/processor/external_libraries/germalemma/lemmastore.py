@@ -0,0 +1,161 @@
+# -*- coding: utf-8
+
+"""
+Compact, memory-mapped lemmata store for GermaLemma.
+
+The lemmata dictionaries (`lemmata` and `lemmata_lower`) are written into a single file with one sorted table per
+POS prefix. Lookups are binary searches directly on the memory-mapped file, so no Python dictionaries have to be
+materialised and several processes share the file through the page cache.
+
+File layout (little-endian):
+
+- header: magic b'GLMS', format version (uint16), amount of tables (uint16)
+- table directory: per table its name (8 bytes, e.g. b'N' or b'N.lower'), amount of entries (uint32), offset of the
+  index (uint64) and offset of the data (uint64)
+- per table an index of fixed-width entries sorted by the UTF-8 encoded token: offset of the token in the data
+  (uint32), length of the token (uint16), length of the lemma (uint16)
+- per table the data: every UTF-8 encoded token directly followed by its lemma
+"""
+
+import mmap
+import struct
+
+MAGIC = b'GLMS'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHH')
+TABLE = struct.Struct('<8sIQQ')
+ENTRY = struct.Struct('<IHH')
+
+LOWER_SUFFIX = '.lower'
+
+
+class LemmaTable(object):
+    """
+    Sorted token -> lemma table of one POS prefix inside a memory-mapped LemmaStore. Supports `get` like a dict.
+    """
+
+    def __init__(self, buffer, count, index_offset, data_offset):
+        self.buffer = buffer
+        self.count = count
+        self.index_offset = index_offset
+        self.data_offset = data_offset
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def get(self, token, default=None):
+        """
+        Binary search for `token`. Return its lemma or `default` if it was not found.
+        """
+        key = token.encode('utf-8')
+        buffer = self.buffer
+        index_offset = self.index_offset
+        data_offset = self.data_offset
+        unpack = ENTRY.unpack_from
+        entry_size = ENTRY.size
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            token_offset, token_length, lemma_length = unpack(buffer, index_offset + middle * entry_size)
+            start = data_offset + token_offset
+            candidate = buffer[start:start + token_length]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                start += token_length
+                return buffer[start:start + lemma_length].decode('utf-8')
+        return default
+
+
+class EmptyLemmaTable(object):
+    """
+    Placeholder for POS prefixes without a table in the store.
+    """
+
+    def __len__(self):
+        return 0
+
+    def __contains__(self, token):
+        return False
+
+    def get(self, token, default=None):
+        return default
+
+
+class LemmaTables(dict):
+    """
+    POS prefix -> LemmaTable mapping which returns an empty table for unknown prefixes like a defaultdict.
+    """
+
+    def __missing__(self, pos):
+        return EmptyLemmaTable()
+
+
+class LemmaStore(object):
+    """
+    Read-only, memory-mapped lemmata store. `lemmata` and `lemmata_lower` can be used in place of the dictionaries of
+    GermaLemma.
+    """
+
+    def __init__(self, store_file):
+        self.store_file = store_file
+        with open(store_file, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, amount_tables = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("'%s' is no lemmata store" % store_file)
+        if version != VERSION:
+            raise ValueError("Unsupported lemmata store version %d in '%s'" % (version, store_file))
+
+        self.lemmata = LemmaTables()
+        self.lemmata_lower = LemmaTables()
+        for i in range(amount_tables):
+            name, count, index_offset, data_offset = TABLE.unpack_from(self.buffer, HEADER.size + i * TABLE.size)
+            name = name.rstrip(b'\0').decode('ascii')
+            table = LemmaTable(self.buffer, count, index_offset, data_offset)
+            if name.endswith(LOWER_SUFFIX):
+                self.lemmata_lower[name[:-len(LOWER_SUFFIX)]] = table
+            else:
+                self.lemmata[name] = table
+
+    def close(self):
+        self.buffer.close()
+
+
+def write_lemma_store(store_file, lemmata, lemmata_lower):
+    """
+    Write the lemmata dictionaries (POS prefix -> token -> lemma) of GermaLemma into a LemmaStore file.
+    """
+    tables = [(pos, pos_lemmata) for pos, pos_lemmata in sorted(lemmata.items())]
+    tables += [(pos + LOWER_SUFFIX, pos_lemmata) for pos, pos_lemmata in sorted(lemmata_lower.items())]
+
+    encoded_tables = []
+    for name, pos_lemmata in tables:
+        entries = sorted((token.encode('utf-8'), lemma.encode('utf-8')) for token, lemma in pos_lemmata.items())
+        encoded_tables.append((name.encode('ascii'), entries))
+
+    with open(store_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded_tables)))
+
+        offset = HEADER.size + len(encoded_tables) * TABLE.size
+        for name, entries in encoded_tables:
+            data_size = sum(len(token) + len(lemma) for token, lemma in entries)
+            f.write(TABLE.pack(name, len(entries), offset, offset + len(entries) * ENTRY.size))
+            offset += len(entries) * ENTRY.size + data_size
+
+        for name, entries in encoded_tables:
+            token_offset = 0
+            for token, lemma in entries:
+                f.write(ENTRY.pack(token_offset, len(token), len(lemma)))
+                token_offset += len(token) + len(lemma)
+            for token, lemma in entries:
+                f.write(token)
+                f.write(lemma)
@@ -1,4 +1,5 @@
 import re
+from itertools import islice
 
 
 """
@@ -49,19 +50,73 @@ URL_REGEX = re.compile(
     u""
     , re.UNICODE)
 
+"""
+Every URL_REGEX match contains a dot followed by either two TLD characters or a digit of an IP address, texts and
+segments without such a candidate contain no URL.
+"""
+URL_CANDIDATE_REGEX = re.compile(u"\\.(?:[a-z\u00a1-\uffff]{2}|\\d)", re.UNICODE)
+
+"""
+Whitespace which URL_REGEX can never match (the rest of the unicode whitespace lies in the \\u00a1-\\uffff range of host
+names). URLs never span these characters, so URL_REGEX can be applied to the segments between them separately.
+"""
+URL_BARRIER_REGEX = re.compile(u"([\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0]+)")
+
+
+def remove_urls(text):
+    """
+    Removes all URLs from a text, the result is the same as URL_REGEX.sub('', text).
+
+    URL_REGEX backtracks a lot on long texts, so it only runs on the whitespace separated segments which contain a URL
+    candidate.
+
+    :param text: Text
+    :return: Text without URLs
+    """
+    if '.' not in text or not URL_CANDIDATE_REGEX.search(text):
+        return text
+
+    segments = URL_BARRIER_REGEX.split(text)
+    for i in range(0, len(segments), 2):  # the odd indices are the separating whitespace
+        if URL_CANDIDATE_REGEX.search(segments[i]):
+            segments[i] = URL_REGEX.sub('', segments[i])
+    return ''.join(segments)
+
+
 """
 Valid unicodes in decimal including space, digits and latin letters
 """
-VALID_UNICODES = ([]
-                  + [32]                    # space
-                  + [10, 12, 13, 133, 8233, 8232] # line breaks
-                  + list(range(48, 58))     # digits
-                  + list(range(65, 91))     # capital letters
-                  + list(range(97, 123))    # small letters
-                  + list(range(192, 215))   # latin extended
-                  + list(range(216, 247))   # latin extended
-                  + list(range(248, 688))   # latin extended
-                )
+VALID_UNICODES = frozenset([]
+                           + [32]                    # space
+                           + [10, 12, 13, 133, 8233, 8232] # line breaks
+                           + list(range(48, 58))     # digits
+                           + list(range(65, 91))     # capital letters
+                           + list(range(97, 123))    # small letters
+                           + list(range(192, 215))   # latin extended
+                           + list(range(216, 247))   # latin extended
+                           + list(range(248, 688))   # latin extended
+                           )
+
+"""
+Characters which separate words and are replaced by a space when cleaning a text
+"""
+SEPARATOR_CHARACTERS = ['-', '_', '+', '>', '<', '*', '/']
+
+
+class CleaningTable(dict):
+    """
+    str.translate table which keeps the valid unicodes, replaces the separator characters by a space and removes all
+    other characters. Only the valid unicodes and separators are stored up front, every other character is added on
+    its first lookup.
+    """
+
+    def __missing__(self, ordinal):
+        self[ordinal] = None
+        return None
+
+
+CLEANING_TABLE = CleaningTable((ordinal, ordinal) for ordinal in VALID_UNICODES)
+CLEANING_TABLE.update((ord(character), ord(' ')) for character in SEPARATOR_CHARACTERS)
 
 """
 Additional stopwords for german and english.
@@ -98,3 +153,18 @@ BEST64_RULES = [":", "r", "u", "T0", "$0", "$1", "$2", "$3", "$4", "$5", "$6", "
                 "} } } } } } Y4 '4 d", "*04 +0 '4", "*05 O03 d '3 p1", "+0 +0 +0 +0 +0 +0 +0 +0", "+0 +0 +0 O12",
                 "Z4 '8 O42", "Z5 '6 O31 ] p1", "Z5 *75 '5 { O02", "d O28 Y4 '4 d", "f *A5 '8 O14", "p2 '7 p1 O58",
                 "O14 d p2 '6"]
+
+
+def chunks(iterable, size):
+    """
+    Splits an iterable into lists of at most size elements
+
+    :param iterable: Any iterable, e.g. a list of posts
+    :param size: Maximum length of a chunk
+    :return: Generator of lists
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
@@ -1,11 +1,11 @@
 import logging
 import os
-import pickle
 from datetime import datetime, timedelta
 
 import click_spinner
 import facebook
 
+from slughorn.output import OutputFile
 from slughorn.scraper import util
 from slughorn.scraper.constants_factory import get_facebook_email, get_facebook_password, get_facebook_token
 from slughorn.scraper.webdriver.FacebookWebdriver import *
@@ -173,15 +173,10 @@ class FacebookScraper:
         file = os.path.join(directory, 'facebook_{}_{}.{}'.format(self.user_name, today, ('pkl' if pickled else 'txt')))
 
         log.info("Writing Facebook posts to file")
-        if pickled:
-            with open(file, "wb") as f:
-                pickle.dump(self.posts, f)
-        else:
-            output = ''
-            for post in self.posts:
-                output += post + "\n----------\n"
-
-            with open(file=file, mode='w+') as f:
-                f.write(output)
+        with OutputFile(file, binary=pickled) as f:
+            if pickled:
+                util.write_posts(self.posts, f)
+            else:
+                f.writelines(post + "\n----------\n" for post in self.posts)
 
         log.info("Successfully written to file {}".format(file))
@@ -1,12 +1,12 @@
 import logging
 import os
-import pickle
 from datetime import datetime
 
 import click_spinner
 import requests
 from bs4 import BeautifulSoup
 
+from slughorn.output import OutputFile
 from slughorn.scraper.webdriver.TwitterWebdriver import *
 from slughorn.scraper.webspider.TwitterSpider import TwitterSpider
 
@@ -33,21 +33,22 @@ class TwitterScraper:
         self.join_date = self.find_join_date()
         self.tweets = []
 
-    def scrape_all(self):
+    def scrape_all(self, workers=1):
         """
         Scrape all tweets.
     
         Scrape all tweets of the user which name is provided in self.user_name and saves them in self.tweets. Calls 
         self.scrape_timeframe with the users join date and today's date.
     
+        :param workers: Number of time windows which are scraped concurrently
         :return: Number of scraped tweets
     
         """
         today = datetime.now()
         with click_spinner.spinner():
-            return self.scrape_timeframe(self.join_date, today)
+            return self.scrape_timeframe(self.join_date, today, workers)
 
-    def scrape_timeframe(self, from_date, to_date):
+    def scrape_timeframe(self, from_date, to_date, workers=1):
         """
         Scrape specific time frame.
 
@@ -57,6 +58,7 @@ class TwitterScraper:
 
         :param from_date: start date of time frame (tweets from this day are included)
         :param to_date: end date of time frame (tweets from this day are included)
+        :param workers: Number of time windows which are scraped concurrently, 1 scrapes the whole time frame at once
         :return: Number of scraped tweets
         """
         # twitter_webdriver = TwitterWebdriver('/usr/local/bin/chromedriver')
@@ -68,7 +70,10 @@ class TwitterScraper:
         to_date = util.format_date(to_date)
 
         twitter_spider = TwitterSpider(user_name=self.user_name, from_date=from_date, to_date=to_date)
-        tweets = twitter_spider.get_tweets_from_profile()
+        if workers > 1:
+            tweets = twitter_spider.get_tweets_concurrently(workers)
+        else:
+            tweets = twitter_spider.get_tweets_from_profile()
         self.tweets = tweets
 
     def find_join_date(self):
@@ -106,15 +111,10 @@ class TwitterScraper:
         file = os.path.join(directory, 'twitter_{}_{}.{}'.format(self.user_name, today, ('pkl' if pickled else 'txt')))
 
         log.info("Writing Tweets to file")
-        if pickled:
-            with open(file, "wb") as f:
-                pickle.dump(self.tweets, f)
-        else:
-            output = ''
-            for post in self.tweets:
-                output += post + "\n----------\n"
-
-            with open(file=file, mode='w+') as f:
-                f.write(output)
+        with OutputFile(file, binary=pickled) as f:
+            if pickled:
+                util.write_posts(self.tweets, f)
+            else:
+                f.writelines(post + "\n----------\n" for post in self.tweets)
 
         log.info("Successfully written to file {}".format(file))
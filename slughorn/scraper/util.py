@@ -2,6 +2,13 @@ import pickle
 import re
 from datetime import datetime
 
+# Amount of posts per pickled chunk in the scraper output files
+POSTS_CHUNK_SIZE = 1000
+
+# Header record of the scraper output files, version 1 files (a single pickled list of posts) have no header
+POSTS_FORMAT = 'slughorn posts'
+POSTS_VERSION = 2
+
 # These regular expressions only work if the FacebookScraper's profile is set to german
 FB_DATE_REGEX = re.compile(u'^(\d){1,2}\. \w*( (\d){4})? um (\d){2}:(\d){2} .*$', re.UNICODE | re.MULTILINE)
 FB_LIKE_REGEX = re.compile(u'^.* ?Gefällt mir.*$', re.UNICODE | re.MULTILINE)
@@ -93,3 +100,66 @@ def create_url_for_facebook_api(numeric_id, from_date, to_date):
     to_string = format_date(to_date)
     url = "/{}/posts?limit=100&since={}&until={}".format(numeric_id, from_string, to_string)
     return url
+
+
+
+def write_posts(posts, f, chunk_size=POSTS_CHUNK_SIZE):
+    """
+    Pickle posts to a file in chunks.
+
+    The posts are written as a pickled header record ({'format': POSTS_FORMAT, 'version': POSTS_VERSION}) followed by
+    a sequence of pickled lists with at most chunk_size posts each, so that they can be read lazily with load_posts.
+
+    Parameters
+    ----------
+    posts : list
+        posts to be written
+    f : file
+        file object opened in binary mode
+    chunk_size : int
+        maximum amount of posts per pickled chunk
+    """
+    pickle.dump({'format': POSTS_FORMAT, 'version': POSTS_VERSION}, f)
+    for start in range(0, len(posts), chunk_size):
+        pickle.dump(posts[start:start + chunk_size], f)
+
+
+def load_posts(file):
+    """
+    Read posts lazily from a scraper output file.
+
+    Reads one pickled chunk of posts at a time, so only a bounded amount of posts is held in memory. Files of version 1
+    without a header record, which contain a single pickled list of posts, are supported as well.
+
+    Parameters
+    ----------
+    file : str
+        path to the pickled scraper output
+
+    Returns
+    -------
+    generator
+        posts of the file
+
+    Raises
+    ------
+    ValueError
+        if the file is no scraper output file or was written by a newer version of slughorn
+    """
+    with open(file, 'rb') as f:
+        try:
+            header = pickle.load(f)
+        except EOFError:
+            return
+        if isinstance(header, list):
+            yield from header
+        elif not isinstance(header, dict) or header.get('format') != POSTS_FORMAT:
+            raise ValueError("'{}' is no scraper output file".format(file))
+        elif header.get('version') != POSTS_VERSION:
+            raise ValueError("Unsupported scraper output version {} in '{}'".format(header.get('version'), file))
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
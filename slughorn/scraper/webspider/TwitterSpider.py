@@ -1,4 +1,6 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from time import sleep
 
 import requests
@@ -11,6 +13,13 @@ log = logging.getLogger('slughorn')
 
 SLEEP_TIME = 1
 
+BASE_URL = "https://twitter.com"
+
+# length of the time windows which are scraped concurrently
+WINDOW_DAYS = 90
+
+DATE_FORMAT = '%Y-%m-%d'
+
 
 def sanitize_text(text):
     text = text.strip(' \t\n\r')
@@ -20,15 +29,45 @@ def sanitize_text(text):
     return text
 
 
+def split_time_range(from_date, to_date, window_days=WINDOW_DAYS):
+    """
+    Splits a time range into consecutive time windows.
+
+    :param from_date: Start date of the range as string, e.g. '2018-01-21'
+    :param to_date: End date of the range as string
+    :param window_days: Length of a time window in days
+    :return: List of (from_date, to_date) strings, the end of a window is the start of the next one
+    """
+    start = datetime.strptime(from_date, DATE_FORMAT)
+    end = datetime.strptime(to_date, DATE_FORMAT)
+    windows = []
+    while start < end:
+        window_end = min(start + timedelta(days=window_days), end)
+        windows.append((start.strftime(DATE_FORMAT), window_end.strftime(DATE_FORMAT)))
+        start = window_end
+    return windows or [(from_date, to_date)]
+
+
 class TwitterSpider:
 
-    def __init__(self, user_name, from_date, to_date):
+    def __init__(self, user_name, from_date, to_date, base_url=BASE_URL):
         self.user_name = user_name
-        self.url = "https://twitter.com/i/search/timeline?l=&f=tweets&q=from%3A{}%20since%3A{}%20until%3A{}include%3Aretweets&src=typed&max_position={}".format(
-            user_name, from_date, to_date, '{}')
+        self.from_date = from_date
+        self.to_date = to_date
+        self.base_url = base_url
+        self.url = self.search_url(from_date, to_date)
         self.tweets = []
         self.last_url = ''
 
+    def search_url(self, from_date, to_date):
+        """
+        :param from_date: Start date of the search as string
+        :param to_date: End date of the search as string
+        :return: URL of the search timeline with a placeholder for the max_position
+        """
+        return "{}/i/search/timeline?l=&f=tweets&q=from%3A{}%20since%3A{}%20until%3A{}include%3Aretweets&src=typed&max_position={}".format(
+            self.base_url, self.user_name, from_date, to_date, '{}')
+
     def get_tweets_from_profile(self):
         # set url for first round
         url = self.url.format('')
@@ -44,6 +83,55 @@ class TwitterSpider:
 
         return self.tweets
 
+    def get_tweets_concurrently(self, workers=4, window_days=WINDOW_DAYS, chronological=False):
+        """
+        Splits the time range of the spider into time windows and scrapes them concurrently in a pool of threads.
+        Every window is scraped page by page like get_tweets_from_profile. Tweets with the same id (e.g. found in two
+        windows) are only kept once. The tweets are merged newest first by default, so the result is the same as the
+        one of get_tweets_from_profile.
+
+        :param workers: Number of threads
+        :param window_days: Length of a time window in days
+        :param chronological: Whether the tweets are returned oldest first instead of newest first
+        :return: List of tweets
+        """
+        windows = split_time_range(self.from_date, self.to_date, window_days)
+        log.debug("Scraping {} time windows with {} threads".format(len(windows), workers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            window_items = list(executor.map(lambda window: self.get_items_of_window(*window), windows))
+
+        # the windows are in chronological order and every window is newest first
+        seen = set()
+        self.tweets = []
+        for window in reversed(window_items):
+            for tweet_id, tweet_text in window:
+                if tweet_id is None or tweet_id not in seen:
+                    seen.add(tweet_id)
+                    self.tweets.append(tweet_text)
+        if chronological:
+            self.tweets.reverse()
+        return self.tweets
+
+    def get_items_of_window(self, from_date, to_date):
+        """
+        Scrapes all pages of the search timeline of one time window.
+
+        :param from_date: Start date of the window as string
+        :param to_date: End date of the window as string
+        :return: List of (tweet id, tweet text) newest first
+        """
+        url_template = self.search_url(from_date, to_date)
+        url = url_template.format('')
+        last_url = ''
+        items = []
+        while url != last_url:
+            log.debug("Scraping url: {}".format(url))
+            data = self.get_json(url)
+            items.extend(self.parse_items(data))
+            last_url = url
+            url = url_template.format(data['min_position'])
+        return items
+
     def get_json(self, url):
         header = {'User-Agent': str(ua.random)}
         r = requests.get(url, headers=header, allow_redirects=False)
@@ -56,13 +144,21 @@ class TwitterSpider:
         return data
 
     def parse(self, data):
-
+        self.tweets.extend(tweet_text for _, tweet_text in self.parse_items(data))
+
+    def parse_items(self, data):
+        """
+        :param data: JSON page of the search timeline
+        :return: List of (tweet id, tweet text) of the page, the id is None if the page does not contain it
+        """
+        items = []
         items_html = data['items_html']
         items_html = items_html.strip().encode('utf8')
 
         if items_html:
             parser = etree.XMLParser(recover=True, encoding='utf8')
-            root = etree.fromstring(items_html, parser=parser)
+            # the items are a sequence of <li> elements without a common root, the parser would stop after the first one
+            root = etree.fromstring(b'<ol>' + items_html + b'</ol>', parser=parser)
             tweet_items = root.xpath('//li[@data-item-type="tweet"]/div')
 
             for tweet_item in tweet_items:
@@ -83,4 +179,6 @@ class TwitterSpider:
                 tweet_text = p_html_element.text_content()
                 tweet_text = sanitize_text(tweet_text)
                 if tweet_text:
-                    self.tweets.append(tweet_text)
+                    items.append((tweet_item.getparent().get('data-item-id'), tweet_text))
+
+        return items